@@ -2,27 +2,30 @@
 
 #  Copyright 2024 Denis Lussier All rights reserved. #
 
-import sqlite
+import os, sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "lib"))
+
 import fire
-from prettytable import PrettyTable
+import lazy
+import metadata
+import geo
+import render
 
+util = lazy.load("util")
 
 
 def airport_list(geo=None, country=None, airport=None, provider=None):
-    import sqlite
-    wr = "1 = 1"
-    if geo:
-        wr = wr + f" AND geo = '{geo}'"
-    if country:
-        wr = wr + f" AND country = '{country}'"
-    if airport:
-        wr = wr + f" AND airport = '{airport}'"
-    if provider:
-        wr = wr + f" AND provider= '{provider}'"
+    wr = ["1 = 1"]
+    parms = []
+    for col, val in (("geo", geo), ("country", country), ("airport", airport), ("provider", provider)):
+        if val:
+            wr.append(f"{col} = ?")
+            parms.append(val)
     cols = "geo, country, airport, airport_area, lattitude, longitude, provider, region, parent, zones"
     try:
-        cursor = cL.cursor()
-        cursor.execute(f"SELECT {cols} FROM v_airports WHERE {wr}")
+        cursor = metadata.connect().cursor()
+        cursor.execute(f"SELECT {cols} FROM v_airports WHERE {' AND '.join(wr)}", parms)
         data = cursor.fetchall()
     except Exception as e:
         util.exit_message(str(e), 1)
@@ -33,8 +36,7 @@ def airport_list(geo=None, country=None, airport=None, provider=None):
     return (al)
 
 
-
-def list_airports(geo=None, country=None, airport=None, provider=None):
+def list_airports(geo=None, country=None, airport=None, provider=None, pretty=True, format="table"):
     """List airport codes & provider regions"""
 
     al = airport_list(geo, country, airport, provider)
@@ -42,24 +44,143 @@ def list_airports(geo=None, country=None, airport=None, provider=None):
     if not pretty:
         return(al)
 
-    p = PrettyTable()
-    p.field_names = ["Geo", "Country", "Airport", "Area", "Lattitude", "Longitude", "Provider", "Region", "Parent", "Zones"]
-    p.float_format = ".4"
-    p.align["Lattitude"] = "r"
-    p.align["Longitude"] = "r"
-    p.align["Area"] = "l"
-    p.align["Region"] = "l"
-    p.align["Parent"] = "l"
-    p.align["Zones"] = "l"
-    p.add_rows(al)
-    print(p)
+    render.emit(["Geo", "Country", "Airport", "Area", "Lattitude", "Longitude", "Provider", "Region", "Parent", "Zones"], al,
+                format, {"Lattitude": "r", "Longitude": "r", "Area": "l", "Region": "l", "Parent": "l", "Zones": "l"},
+                float_format=".4")
+
+    return
+
+
+def airport_search(text, limit=10, provider=None):
+    """[score, airport, area, country, provider, region] rows best match first
+
+    Candidates come from the airport_trigrams index (rows sharing at least
+    half of the query's trigrams); a code, area or region that starts with
+    the query ranks above a fuzzy match.
+    """
+    grams = metadata.trigrams(text)
+    if not grams:
+        util.exit_message("nothing to search for")
+
+    marks = ", ".join("?" * len(grams))
+    sql = "SELECT s.id, s.airport, s.area, s.country, s.provider, s.region, count(*) AS hits" \
+          "  FROM airport_trigrams t, airport_search s" \
+         f" WHERE t.gram IN ({marks}) AND s.id = t.id"
+    parms = list(grams)
+    if provider:
+        sql = sql + " AND s.provider = ?"
+        parms.append(provider)
+    sql = sql + " GROUP BY s.id HAVING count(*) * 2 >= ?"
+    parms.append(len(grams))
+
+    try:
+        cursor = metadata.connect().cursor()
+        cursor.execute(sql, parms)
+        data = cursor.fetchall()
+    except Exception as e:
+        if "no such table" in str(e):
+            util.exit_message("the metadata DB has no search index yet, run 'kloud metadata build'")
+        util.exit_message(str(e), 1)
+
+    query = metadata.normalize(text)
+    al = []
+    for d in data:
+        score = d[6] / len(grams)
+        if any(metadata.normalize(f).startswith(query) for f in (d[1], d[2], d[5])):
+            score = score + 1
+        al.append([round(score, 2), d[1], d[2], d[3], d[4], d[5]])
+    al.sort(key=lambda a: (-a[0], a[1], a[4]))
+
+    return (al[:int(limit)])
+
+
+def search_airports(text, limit=10, provider=None, pretty=True, format="table"):
+    """Prefix & fuzzy search over airport codes, areas, countries & regions"""
+
+    al = airport_search(text, limit, provider)
+
+    if not pretty:
+        return(al)
+
+    render.emit(["Score", "Airport", "Area", "Country", "Provider", "Region"], al, format,
+                {"Score": "r", "Area": "l", "Region": "l"})
+
+    return
+
+
+# (v_airports rows, geo.PointIndex over them) built on first use
+_regions = None
+
+
+def region_points():
+    global _regions
+
+    if _regions is None:
+        al = airport_list()
+        _regions = (al, geo.PointIndex([(a[4], a[5]) for a in al]))
+
+    return _regions
+
+
+def parse_location(location):
+    """(lat, lon) from 'lat,lon' (or a parsed pair) or an airport code"""
+    if isinstance(location, (list, tuple)) and len(location) == 2:
+        return (float(location[0]), float(location[1]))
+
+    location = str(location).strip()
+    if "," in location:
+        try:
+            lat, lon = location.split(",")
+            return (float(lat), float(lon))
+        except ValueError:
+            util.exit_message(f"cannot parse '{location}' into lat,lon")
+
+    cursor = metadata.connect().cursor()
+    cursor.execute("SELECT lattitude, longitude FROM airports WHERE airport = ?",
+                   (location.lower(),))
+    data = cursor.fetchone()
+    if not data:
+        util.exit_message(f"'{location}' is not a known airport or a lat,lon")
+
+    return (data[0], data[1])
+
+
+def airport_near(location, k=5, radius_km=None, provider=None):
+    lat, lon = parse_location(location)
+    rows, index = region_points()
+
+    candidates = None
+    if provider:
+        candidates = [i for i, a in enumerate(rows) if a[6] == provider]
+
+    al = []
+    for km, i in index.nearest(lat, lon, k, radius_km, candidates):
+        a = rows[i]
+        al.append([round(km), a[2], a[3], a[1], a[6], a[7]])
+
+    return (al)
+
+
+def near_airports(location, k=5, radius_km=None, provider=None, pretty=True, format="table"):
+    """Closest provider regions to 'lat,lon' or an airport code"""
+
+    al = airport_near(location, k, radius_km, provider)
+
+    if not pretty:
+        return(al)
+
+    render.emit(["Km", "Airport", "Area", "Country", "Provider", "Region"], al, format,
+                {"Km": "r", "Area": "l", "Region": "l"})
 
     return
 
 
+COMMANDS = \
+    {
+        "list": list_airports,
+        "near": near_airports,
+        "search": search_airports,
+    }
+
 if __name__ == "__main__":
-    fire.Fire(
-        {
-            "list": list_airports,
-        }
-    )
+    fire.Fire(COMMANDS)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+#  Copyright 2024 Denis Lussier All rights reserved. #
+
+import os, sys, io, contextlib, subprocess, statistics, time
+import importlib.util
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "lib"))
+
+import fire
+from fire import inspectutils
+
+MY_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def time_runs(argv, runs):
+    """Wall clock milliseconds for each of 'runs' cold starts of argv"""
+    ms = []
+    for i in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=MY_DIR, stdout=subprocess.DEVNULL, check=True)
+        ms.append((time.perf_counter() - start) * 1000)
+
+    return ms
+
+
+def startup(command="provider list", runs=10, max_ratio=1.5, budget_ms=None):
+    """Cold-start latency of 'kloud <command>' vs running the module directly
+
+    The module run is one interpreter doing the real work, which is the floor
+    for the launcher.  The old launcher re-spawned python for every command
+    (ratio ~2.0), so a ratio above max_ratio means that regression is back.
+    Skipped (exit 0) when 'util', which every command group loads, is not
+    installed alongside this tree.
+    """
+
+    if importlib.util.find_spec("util") is None:
+        print("SKIP: module 'util' not found; 'kloud' commands cannot run in this tree")
+        sys.exit(0)
+
+    args = str(command).split()
+    kloud_ms = time_runs([sys.executable, "kloud"] + args, runs)
+    module_ms = time_runs([sys.executable, f"{args[0]}.py"] + args[1:], runs)
+
+    kloud_med = statistics.median(kloud_ms)
+    module_med = statistics.median(module_ms)
+    ratio = kloud_med / module_med
+
+    print(f"kloud {command:<20} median {kloud_med:8.1f} ms  (min {min(kloud_ms):.1f})")
+    print(f"{args[0] + '.py':<26} median {module_med:8.1f} ms  (min {min(module_ms):.1f})")
+    print(f"{'ratio':<26} {ratio:15.2f}")
+
+    rc = 0
+    if ratio > max_ratio:
+        print(f"FAIL: ratio {ratio:.2f} exceeds max_ratio {max_ratio}")
+        rc = 1
+    if budget_ms and kloud_med > budget_ms:
+        print(f"FAIL: median {kloud_med:.1f} ms exceeds budget {budget_ms} ms")
+        rc = 1
+
+    sys.exit(rc)
+
+
+class Step:
+    """Component for 'chain': every 'next' returns one level deeper"""
+
+    def __init__(self, depth=0):
+        self.depth = depth
+
+    def next(self):
+        return Step(self.depth + 1)
+
+
+def chain(depth=20, runs=200):
+    """Per-step cost of a deep chained command ('next next ... depth')
+
+    Each step is a member access plus a call.  Their source locations are
+    only looked up when a trace is shown (--trace, help, errors); the
+    lookup column is what every step paid before that was deferred.
+    """
+
+    depth, runs = int(depth), int(runs)
+    command = ["next"] * depth + ["depth"]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        fire.Fire(Step, command=command)
+        start = time.perf_counter()
+        for i in range(runs):
+            fire.Fire(Step, command=command)
+        run_us = (time.perf_counter() - start) * 1e6 / runs
+
+    step = Step()
+    start = time.perf_counter()
+    for i in range(runs):
+        inspectutils.GetFileAndLine(step.next)
+        inspectutils.GetFileAndLine(Step.next)
+    locate_us = (time.perf_counter() - start) * 1e6 / runs
+
+    print(f"{depth} steps, {runs} runs")
+    print(f"{'dispatch per step':<26} {run_us / depth:10.1f} us")
+    print(f"{'deferred lookup per step':<26} {locate_us:10.1f} us")
+
+    return
+
+
+COMMANDS = \
+    {
+        "startup": startup,
+        "chain": chain,
+    }
+
+if __name__ == "__main__":
+    fire.Fire(COMMANDS)
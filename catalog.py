@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+
+#  Copyright 2024 Denis Lussier All rights reserved. #
+
+import os, sys, json, time, threading
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "lib"))
+
+import fire
+import lazy
+import config
+import metadata
+
+util = lazy.load("util")
+
+KINDS = ["sizes", "images", "locations", "keys"]
+
+DDL = """
+CREATE TABLE IF NOT EXISTS catalog (
+  provider    TEXT  NOT NULL,
+  region      TEXT  NOT NULL,
+  kind        TEXT  NOT NULL,
+  key         TEXT  NOT NULL,
+  data        TEXT  NOT NULL,
+  PRIMARY KEY (provider, region, kind, key)
+);
+
+CREATE TABLE IF NOT EXISTS catalog_fetches (
+  provider    TEXT  NOT NULL,
+  region      TEXT  NOT NULL,
+  kind        TEXT  NOT NULL,
+  fetched     REAL  NOT NULL,
+  PRIMARY KEY (provider, region, kind)
+);
+"""
+
+# (provider, region, kind) --> {key: libcloud object} for this process
+_memo = {}
+_lock = threading.RLock()
+# (provider, region, kind) --> lock held while that one catalog is fetched live
+_fetch_locks = {}
+_ready = False
+
+
+def connect():
+    """Metadata DB connection with the catalog tables in place"""
+    global _ready
+
+    cL = metadata.connect()
+    if not _ready:
+        cL.executescript(DDL)
+        _ready = True
+
+    return cL
+
+
+def ttl():
+    """Seconds a cached catalog stays valid ([common] catalog_ttl)"""
+    common = config.get_sections().get("common", {})
+    try:
+        return float(common.get("catalog_ttl", 86400))
+    except ValueError:
+        util.exit_message(f"invalid catalog_ttl '{common['catalog_ttl']}'")
+
+
+def target(conn):
+    """(provider, region) a driver's catalogs belong to
+
+    Only EC2 catalogs are regional; EQN & AKM drivers see the same catalog
+    from everywhere, so they are cached once under region ''.
+    """
+    provider = config.alias(conn.type)
+    if provider == "aws":
+        return (provider, conn.region_name)
+
+    return (provider, "")
+
+
+def lookup_key(kind, o):
+    if kind == "locations":
+        return o.name.lower()
+    if kind == "keys":
+        return o.name
+
+    return o.id
+
+
+def to_json(kind, o):
+    if kind == "sizes":
+        d = {"id": o.id, "name": o.name, "ram": o.ram, "disk": o.disk,
+             "bandwidth": o.bandwidth, "price": o.price}
+    elif kind == "images":
+        d = {"id": o.id, "name": o.name}
+    elif kind == "locations":
+        d = {"id": o.id, "name": o.name, "country": o.country}
+    else:
+        d = {"name": o.name, "public_key": o.public_key, "fingerprint": o.fingerprint}
+    d["extra"] = o.extra
+
+    return json.dumps(d, default=str)
+
+
+def from_json(kind, data, conn):
+    from libcloud.compute.base import NodeSize, NodeImage, NodeLocation, KeyPair
+
+    d = json.loads(data)
+    if kind == "sizes":
+        return NodeSize(d["id"], d["name"], d["ram"], d["disk"], d["bandwidth"],
+                        d["price"], conn, extra=d["extra"])
+    if kind == "images":
+        return NodeImage(d["id"], d["name"], conn, extra=d["extra"])
+    if kind == "locations":
+        return NodeLocation(d["id"], d["name"], d["country"], conn, extra=d["extra"])
+
+    return KeyPair(d["name"], d["public_key"], d["fingerprint"], conn, extra=d["extra"])
+
+
+def fetch(conn, kind):
+    """Live listing of one catalog kind from the provider API"""
+    if kind == "sizes":
+        return conn.list_sizes()
+    if kind == "images":
+        return conn.list_images()
+    if kind == "locations":
+        return conn.list_locations()
+
+    return conn.list_key_pairs()
+
+
+def store(conn, kind, objs, replace=True):
+    """Write catalog entries (replacing the whole kind unless replace=False)
+
+    A whole kind is stamped as fetched under its own name; entries added
+    with replace=False are stamped one by one as '<kind>:<key>', so they
+    do not make the rest of the kind look fresh.
+    """
+    provider, region = target(conn)
+    rows = [(provider, region, kind, lookup_key(kind, o), to_json(kind, o)) for o in objs]
+    if replace:
+        stamps = [kind]
+    else:
+        stamps = [f"{kind}:{r[3]}" for r in rows]
+    now = time.time()
+
+    with _lock:
+        cL = connect()
+        with cL:
+            if replace:
+                cL.execute("DELETE FROM catalog WHERE provider = ? AND region = ? AND kind = ?",
+                           (provider, region, kind))
+            cL.executemany("INSERT OR REPLACE INTO catalog VALUES (?, ?, ?, ?, ?)", rows)
+            cL.executemany("INSERT OR REPLACE INTO catalog_fetches VALUES (?, ?, ?, ?)",
+                           [(provider, region, k, now) for k in stamps])
+
+        cat = _memo.setdefault((provider, region, kind), {})
+        if replace:
+            cat.clear()
+        cat.update((lookup_key(kind, o), o) for o in objs)
+
+        return cat
+
+
+def is_fresh(provider, region, kind):
+    """True if a catalog kind was fetched within the TTL"""
+    cursor = connect().cursor()
+    cursor.execute("SELECT fetched FROM catalog_fetches WHERE provider = ? AND region = ? AND kind = ?",
+                   (provider, region, kind))
+    data = cursor.fetchone()
+
+    return bool(data) and (time.time() - data[0]) <= ttl()
+
+
+def cached_keys(conn, kind):
+    """Keys held in the DB for a catalog kind (fresh or not)"""
+    cursor = connect().cursor()
+    cursor.execute("SELECT key FROM catalog WHERE provider = ? AND region = ? AND kind = ?",
+                   target(conn) + (kind,))
+
+    return [r[0] for r in cursor.fetchall()]
+
+
+def load(conn, kind):
+    """Cached catalog from the DB if it's within the TTL, else None"""
+    provider, region = target(conn)
+
+    with _lock:
+        if not is_fresh(provider, region, kind):
+            return None
+
+        cursor = connect().cursor()
+        cursor.execute("SELECT key, data FROM catalog WHERE provider = ? AND region = ? AND kind = ?",
+                       (provider, region, kind))
+        cat = {k: from_json(kind, d, conn) for k, d in cursor.fetchall()}
+        _memo[(provider, region, kind)] = cat
+
+        return cat
+
+
+def get(conn, kind):
+    """{key: object} catalog for a driver, fetched live only when stale
+
+    A live fetch holds only its own (provider, region, kind) lock, so cold
+    catalogs of different targets are fetched concurrently while a second
+    caller for the same one waits for (and reuses) the first one's result.
+    """
+    return get_catalog(conn, kind)[0]
+
+
+def get_catalog(conn, kind):
+    """get(), plus whether the catalog was just fetched live"""
+    memo_key = target(conn) + (kind,)
+    with _lock:
+        cat = _memo.get(memo_key)
+        if cat is None:
+            cat = load(conn, kind)
+        if cat is not None:
+            return (cat, False)
+        fetch_lock = _fetch_locks.setdefault(memo_key, threading.Lock())
+
+    with fetch_lock:
+        cat = _memo.get(memo_key)
+        if cat is None:
+            cat = store(conn, kind, fetch(conn, kind))
+
+    return (cat, True)
+
+
+def lookup(conn, kind, key):
+    """One catalog entry; a miss re-fetches the kind once before giving up
+
+    No re-fetch when get() has just fetched the kind live: the entry is
+    not there.
+    """
+    if kind == "images" and target(conn)[0] == "aws":
+        return lookup_aws_image(conn, key)
+
+    cat, fetched = get_catalog(conn, kind)
+    o = cat.get(key)
+    if o is None and not fetched:
+        o = store(conn, kind, fetch(conn, kind)).get(key)
+
+    return o
+
+
+def lookup_aws_image(conn, image_id):
+    """EC2's public image catalog is far too big to list; cache by id"""
+    o = get_cached(conn, "images", image_id)
+    if o is None:
+        images = conn.list_images(ex_image_ids={image_id})
+        store(conn, "images", images, replace=False)
+        o = _memo.get(target(conn) + ("images",), {}).get(image_id)
+
+    return o
+
+
+def get_cached(conn, kind, key):
+    provider, region = target(conn)
+    cat = _memo.get((provider, region, kind))
+    if cat and key in cat:
+        return cat[key]
+
+    with _lock:
+        if not (is_fresh(provider, region, kind) or is_fresh(provider, region, f"{kind}:{key}")):
+            return None
+
+        cursor = connect().cursor()
+        cursor.execute("SELECT data FROM catalog WHERE provider = ? AND region = ? AND kind = ? AND key = ?",
+                       (provider, region, kind, key))
+        data = cursor.fetchone()
+        if not data:
+            return None
+
+        o = from_json(kind, data[0], conn)
+        _memo.setdefault((provider, region, kind), {})[key] = o
+
+        return o
+
+
+def refresh(provider, airport=None, project=None):
+    """Re-fetch the size, image, location & key catalogs for a provider"""
+    import vm
+
+    region = vm.get_region(provider, airport)
+    conn, sect, region, airport, project = vm.get_connection(provider, region, project)
+
+    for kind in KINDS:
+        try:
+            if kind == "images" and target(conn)[0] == "aws":
+                ids = cached_keys(conn, kind)
+                objs = conn.list_images(ex_image_ids=set(ids)) if ids else []
+            else:
+                objs = fetch(conn, kind)
+        except Exception as e:
+            util.exit_message(str(e), 1)
+        store(conn, kind, objs)
+        util.message(f"  # {provider}:{target(conn)[1]} {kind:<9} {len(objs)}")
+
+    return
+
+
+COMMANDS = \
+    {
+        "refresh": refresh,
+    }
+
+if __name__ == "__main__":
+    fire.Fire(COMMANDS)
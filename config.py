@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+#  Copyright 2024 Denis Lussier All rights reserved. #
+
+import os, sys, configparser, threading
+from types import MappingProxyType
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "lib"))
+
+import lazy
+from provider import PROVIDERS
+
+util = lazy.load("util")
+
+CONFIG = f"{os.getenv('HOME')}/.pgedge-vm.conf"
+
+# every spelling of a provider --> (kloud alias, libcloud name)
+ALIASES = {}
+for p in PROVIDERS:
+    ALIASES[p[0]] = (p[0], p[1])
+    ALIASES[p[1]] = (p[0], p[1])
+
+# parsed once per process & re-parsed only when the file's mtime changes
+_lock = threading.Lock()
+_cache = {"mtime": None, "sections": {}}
+
+
+def alias(provider):
+    """kloud alias for a provider (ec2 --> aws, equinixmetal --> eqn, ...)"""
+    return ALIASES.get(provider, (provider, provider))[0]
+
+
+def libcloud_name(provider):
+    """libcloud driver name for a provider (aws --> ec2, akm --> linode, ...)"""
+    return ALIASES.get(provider, (provider, provider))[1]
+
+
+def get_sections():
+    """All config sections as read-only mappings, keyed by section name"""
+    try:
+        mtime = os.stat(CONFIG).st_mtime_ns
+    except OSError:
+        util.exit_message(f"config file {CONFIG} missing")
+
+    with _lock:
+        if _cache["mtime"] != mtime:
+            try:
+                parser = configparser.ConfigParser()
+                parser.read(CONFIG)
+            except Exception as e:
+                util.exit_message(f"cannot parse config file '{CONFIG}': {e}")
+            _cache["sections"] = {
+                s: MappingProxyType(dict(parser[s])) for s in parser.sections()
+            }
+            _cache["mtime"] = mtime
+
+        return _cache["sections"]
+
+
+def load_config(section):
+    """Read-only view of a provider's (or any alias's) config section"""
+    sect = get_sections().get(alias(section))
+    if sect is None:
+        util.exit_message(f"missing section '{section}' in config file '{CONFIG}'")
+
+    return sect
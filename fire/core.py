@@ -53,6 +53,7 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import collections
 import inspect
 import json
 import os
@@ -61,6 +62,7 @@ import re
 import shlex
 import sys
 import types
+import weakref
 
 from fire import completion
 from fire import decorators
@@ -74,9 +76,6 @@ from fire import value_types
 from fire.console import console_io
 import six
 
-if six.PY34:
-  import asyncio  # pylint: disable=import-error,g-import-not-at-top  # pytype: disable=import-error
-
 
 def Fire(component=None, command=None, name=None, serialize=None):
   """This function, Fire, is the main entrypoint for Python Fire.
@@ -451,9 +450,12 @@ def _Fire(component, args, parsed_flag_args, context, name=None):
 
     saved_args = []
     used_separator = False
-    if separator in remaining_args:
-      # For the current component, only use arguments up to the separator.
+    try:
       separator_index = remaining_args.index(separator)
+    except ValueError:
+      separator_index = None
+    if separator_index is not None:
+      # For the current component, only use arguments up to the separator.
       saved_args = remaining_args[separator_index + 1:]
       remaining_args = remaining_args[:separator_index]
       used_separator = True
@@ -526,12 +528,13 @@ def _Fire(component, args, parsed_flag_args, context, name=None):
         # The target isn't present in the dict as a string key, but maybe it is
         # a key as another type.
         # TODO(dbieber): Consider alternatives for accessing non-string keys.
-        for key, value in (
-            component_dict.items()):  # pytype: disable=attribute-error
-          if target == str(key):
-            component = value
-            handled = True
-            break
+        if component_dict is component:
+          key = _GetKeyByStr(component_dict, target)
+        else:
+          key = _KeyIndex(component_dict).get(target, _MISSING)
+        if key is not _MISSING:
+          component = component_dict[key]
+          handled = True
 
       if handled:
         remaining_args = remaining_args[1:]
@@ -552,10 +555,8 @@ def _Fire(component, args, parsed_flag_args, context, name=None):
             component, remaining_args)
         handled = True
 
-        filename, lineno = inspectutils.GetFileAndLine(component)
-
         component_trace.AddAccessedProperty(
-            component, target, consumed_args, filename, lineno)
+            component, target, consumed_args, None, None, source=component)
 
       except FireError as error:
         # Couldn't access member.
@@ -643,7 +644,7 @@ def _GetMember(component, args):
   Raises:
     FireError: If we cannot consume an argument to get a member.
   """
-  members = dir(component)
+  members = None
   arg = args[0]
   arg_names = [
       arg,
@@ -651,12 +652,102 @@ def _GetMember(component, args):
   ]
 
   for arg_name in arg_names:
-    if arg_name in members:
+    has_member = _HasMember(component, arg_name)
+    if has_member is None:
+      if members is None:
+        members = dir(component)
+      has_member = arg_name in members
+    if has_member:
       return getattr(component, arg_name), [arg], args[1:]
 
   raise FireError('Could not consume arg:', arg)
 
 
+def _HasMember(component, name):
+  """Returns whether name is in dir(component), without building dir().
+
+  For modules, classes and instances using the default __dir__, dir() is the
+  union of the keys of the component's __dict__ and of its classes' __dict__s,
+  so those dicts are checked directly.
+
+  Args:
+    component: The component whose members to look in.
+    name: The member name to look for.
+  Returns:
+    Whether name is a member of component, or None if component customizes
+    dir() and dir(component) has to be consulted.
+  """
+  dir_fn = type(component).__dir__
+  if dir_fn is types.ModuleType.__dir__:
+    namespace = getattr(component, '__dict__', None)
+    if not isinstance(namespace, dict) or '__dir__' in namespace:
+      return None
+    return name in namespace
+
+  if dir_fn is type.__dir__:
+    classes = component.__mro__
+  elif dir_fn is object.__dir__ and component.__class__ is type(component):
+    namespace = getattr(component, '__dict__', None)
+    if isinstance(namespace, dict) and name in namespace:
+      return True
+    classes = type(component).__mro__
+  else:
+    return None
+
+  return any(name in cls.__dict__ for cls in classes)
+
+
+_MISSING = object()
+
+# Key indexes of the dicts Fire has looked up non-string keys in, by id. Each
+# entry holds on to its dict, so the id stays valid and only a few are kept.
+_KEY_INDEXES = collections.OrderedDict()
+_KEY_INDEXES_SIZE = 8
+
+
+class _KeyIndex(dict):
+  """Maps str(key) to key for the non-string keys of a dict.
+
+  Where several keys have the same str(), the first in iteration order wins,
+  as it would when scanning the dict.
+  """
+
+  def __init__(self, component_dict):
+    super(_KeyIndex, self).__init__()
+    self.size = len(component_dict)
+    for key in component_dict:
+      if not isinstance(key, six.string_types):
+        self.setdefault(str(key), key)
+
+
+def _GetKeyByStr(component_dict, target):
+  """Returns the non-string key of component_dict whose str() is target.
+
+  The index built for a dict is reused while the dict keeps its size and still
+  has the key found. A miss rebuilds it, so keys added since are never missed.
+
+  Args:
+    component_dict: The dict being looked up in.
+    target: The arg naming the key.
+  Returns:
+    The key, or _MISSING if there is none.
+  """
+  entry = _KEY_INDEXES.get(id(component_dict))
+  if entry is not None:
+    cached_dict, index = entry
+    if cached_dict is component_dict and index.size == len(component_dict):
+      key = index.get(target, _MISSING)
+      if key is not _MISSING and key in component_dict:
+        return key
+
+  index = _KeyIndex(component_dict)
+  _KEY_INDEXES.pop(id(component_dict), None)
+  _KEY_INDEXES[id(component_dict)] = (component_dict, index)
+  while len(_KEY_INDEXES) > _KEY_INDEXES_SIZE:
+    _KEY_INDEXES.popitem(last=False)
+  return index.get(target, _MISSING)
+
+
 def _CallAndUpdateTrace(component, args, component_trace, treatment='class',
                         target=None):
   """Call the component by consuming args from args, and update the FireTrace.
@@ -678,14 +769,14 @@ def _CallAndUpdateTrace(component, args, component_trace, treatment='class',
   """
   if not target:
     target = component
-  filename, lineno = inspectutils.GetFileAndLine(component)
-  metadata = decorators.GetMetadata(component)
   fn = component.__call__ if treatment == 'callable' else component
-  parse = _MakeParseFn(fn, metadata)
-  (varargs, kwargs), consumed_args, remaining_args, capacity = parse(args)
+  plan = _GetCallPlan(component, fn)
+  source = component
+  (varargs, kwargs), consumed_args, remaining_args, capacity = plan.parse(args)
 
   # Call the function.
-  if inspectutils.IsCoroutineFunction(fn):
+  if plan.is_coroutine:
+    import asyncio  # pylint: disable=import-error,g-import-not-at-top  # pytype: disable=import-error
     loop = asyncio.get_event_loop()
     component = loop.run_until_complete(fn(*varargs, **kwargs))
   else:
@@ -698,25 +789,103 @@ def _CallAndUpdateTrace(component, args, component_trace, treatment='class',
   else:
     action = trace.CALLED_CALLABLE
   component_trace.AddCalledComponent(
-      component, target, consumed_args, filename, lineno, capacity,
-      action=action)
+      component, target, consumed_args, None, None, capacity,
+      action=action, source=source)
 
   return component, remaining_args
 
 
-def _MakeParseFn(fn, metadata):
+# Call plans of the callables Fire has dispatched to. Keys are held weakly so a
+# plan goes away with its callable; bound methods are keyed by their function.
+_CALL_PLANS = weakref.WeakKeyDictionary()
+
+
+class _CallPlan(object):
+  """What Fire needs to know to call a callable, introspected once.
+
+  Attributes:
+    metadata: The Fire decorator metadata of the component.
+    fn_spec: The inspectutils.FullArgSpec of the function being called.
+    flag_index: The _FlagIndex resolving flag names against fn_spec.
+    parse: The parse function made by _MakeParseFn.
+    is_coroutine: Whether the function is a coroutine function.
+  """
+
+  def __init__(self, component, fn):
+    self.metadata = decorators.GetMetadata(component)
+    self.fn_spec = inspectutils.GetFullArgSpec(fn)
+    self.flag_index = _FlagIndex(self.fn_spec)
+    self.parse = _MakeParseFn(fn, self.metadata, self.fn_spec, self.flag_index)
+    self.is_coroutine = inspectutils.IsCoroutineFunction(fn)
+
+
+def _GetCallPlan(component, fn):
+  """Returns the _CallPlan for calling fn, the component or its __call__.
+
+  Plans are cached per callable; components that cannot be weakly referenced
+  or hashed get a fresh plan on every call.
+
+  Args:
+    component: The class, routine or callable object being called.
+    fn: The function that will be called for it.
+  Returns:
+    The _CallPlan for fn.
+  """
+  key = component
+  bound = inspect.ismethod(component)
+  if bound:
+    key = component.__func__
+  variant = (bound, type(component))
+
+  try:
+    plans = _CALL_PLANS.get(key)
+    if plans is None:
+      plans = _CALL_PLANS[key] = {}
+  except TypeError:
+    return _CallPlan(component, fn)
+
+  plan = plans.get(variant)
+  if plan is None:
+    plan = plans[variant] = _CallPlan(component, fn)
+  return plan
+
+
+class _FlagIndex(object):
+  """The argument names a function's flags may refer to.
+
+  Attributes:
+    fn_args: The positional and keyword-only argument names, in order.
+    names: The same names as a frozenset.
+    shortcuts: Maps a first letter to the argument names starting with it.
+  """
+
+  def __init__(self, fn_spec):
+    self.fn_args = fn_spec.args + fn_spec.kwonlyargs
+    self.names = frozenset(self.fn_args)
+    self.shortcuts = {}
+    for arg in self.fn_args:
+      if arg:
+        self.shortcuts.setdefault(arg[0], []).append(arg)
+
+
+def _MakeParseFn(fn, metadata, fn_spec=None, flag_index=None):
   """Creates a parse function for fn.
 
   Args:
     fn: The function or class to create the parse function for.
     metadata: Additional metadata about the component the parse function is for.
+    fn_spec: Optional. The inspectutils.FullArgSpec of fn, if already known.
+    flag_index: Optional. The _FlagIndex for fn_spec, if already built.
   Returns:
     A parse function for fn. The parse function accepts a list of arguments
     and returns (varargs, kwargs), remaining_args. The original function fn
     can then be called with fn(*varargs, **kwargs). The remaining_args are
     the leftover args from the arguments to the parse function.
   """
-  fn_spec = inspectutils.GetFullArgSpec(fn)
+  if fn_spec is None:
+    fn_spec = inspectutils.GetFullArgSpec(fn)
+  if flag_index is None:
+    flag_index = _FlagIndex(fn_spec)
 
   # Note: num_required_args is the number of positional arguments without
   # default values. All of these arguments are required.
@@ -725,7 +894,8 @@ def _MakeParseFn(fn, metadata):
 
   def _ParseFn(args):
     """Parses the list of `args` into (varargs, kwargs), remaining_args."""
-    kwargs, remaining_kwargs, remaining_args = _ParseKeywordArgs(args, fn_spec)
+    kwargs, remaining_kwargs, remaining_args = _ParseKeywordArgs(
+        args, fn_spec, flag_index)
 
     # Note: _ParseArgs modifies kwargs.
     parsed_args, kwargs, remaining_args, capacity = _ParseArgs(
@@ -794,15 +964,17 @@ def _ParseArgs(fn_args, fn_defaults, num_required_args, kwargs,
 
   # Select unnamed args.
   parsed_args = []
+  used_positional = 0
   for index, arg in enumerate(fn_args):
     value = kwargs.pop(arg, None)
     if value is not None:  # A value is specified at the command line.
       value = _ParseValue(value, index, arg, metadata)
       parsed_args.append(value)
     else:  # No value has been explicitly specified.
-      if remaining_args and accepts_positional_args:
+      if used_positional < len(remaining_args) and accepts_positional_args:
         # Use a positional arg.
-        value = remaining_args.pop(0)
+        value = remaining_args[used_positional]
+        used_positional += 1
         value = _ParseValue(value, index, arg, metadata)
         parsed_args.append(value)
       elif index < num_required_args:
@@ -818,10 +990,11 @@ def _ParseArgs(fn_args, fn_defaults, num_required_args, kwargs,
   for key, value in kwargs.items():
     kwargs[key] = _ParseValue(value, None, key, metadata)
 
+  remaining_args = remaining_args[used_positional:]
   return parsed_args, kwargs, remaining_args, capacity
 
 
-def _ParseKeywordArgs(args, fn_spec):
+def _ParseKeywordArgs(args, fn_spec, flag_index=None):
   """Parses the supplied arguments for keyword arguments.
 
   Given a list of arguments, finds occurrences of --name value, and uses 'name'
@@ -837,6 +1010,7 @@ def _ParseKeywordArgs(args, fn_spec):
   Args:
     args: A list of arguments.
     fn_spec: The inspectutils.FullArgSpec describing the given callable.
+    flag_index: Optional. The _FlagIndex for fn_spec, if already built.
   Returns:
     kwargs: A dictionary mapping keywords to values.
     remaining_kwargs: A list of the unused kwargs from the original args.
@@ -849,19 +1023,23 @@ def _ParseKeywordArgs(args, fn_spec):
   remaining_kwargs = []
   remaining_args = []
   fn_keywords = fn_spec.varkw
-  fn_args = fn_spec.args + fn_spec.kwonlyargs
+  if flag_index is None:
+    flag_index = _FlagIndex(fn_spec)
+  fn_args = flag_index.names
 
   if not args:
     return kwargs, remaining_kwargs, remaining_args
 
+  tokens = _TokenizeArgs(args)
   skip_argument = False
 
-  for index, argument in enumerate(args):
+  for index, token in enumerate(tokens):
+    argument = token.arg
     if skip_argument:
       skip_argument = False
       continue
 
-    if _IsFlag(argument):
+    if token.kind in _FLAG_KINDS:
       # This is a named argument. We get its value from this arg or the next.
 
       # Terminology:
@@ -872,16 +1050,12 @@ def _ParseKeywordArgs(args, fn_spec):
       #   letter of a longer keyword.
       # keyword: The Python function argument being set by this argument.
       # value: The unparsed value for that Python function argument.
-      contains_equals = '=' in argument
-      stripped_argument = argument.lstrip('-')
-      if contains_equals:
-        key, value = stripped_argument.split('=', 1)
-      else:
-        key = stripped_argument
-
-      key = key.replace('-', '_')
+      key = token.key
+      value = token.value
+      contains_equals = value is not None
       is_bool_syntax = (not contains_equals and
-                        (index + 1 == len(args) or _IsFlag(args[index + 1])))
+                        (index + 1 == len(tokens)
+                         or tokens[index + 1].kind in _FLAG_KINDS))
 
       # Determine the keyword.
       keyword = ''  # Indicates no valid keyword has been found yet.
@@ -891,7 +1065,7 @@ def _ParseKeywordArgs(args, fn_spec):
         keyword = key
       elif len(key) == 1:
         # This may be a shortcut flag.
-        matching_fn_args = [arg for arg in fn_args if arg[0] == key]
+        matching_fn_args = flag_index.shortcuts.get(key, [])
         if len(matching_fn_args) == 1:
           keyword = matching_fn_args[0]
         elif len(matching_fn_args) > 1:
@@ -933,12 +1107,56 @@ def _ParseKeywordArgs(args, fn_spec):
         remaining_kwargs.append(argument)
         if skip_argument:
           remaining_kwargs.append(args[index + 1])
-    else:  # not _IsFlag(argument)
+    else:  # A positional arg or a negative number.
       remaining_args.append(argument)
 
   return kwargs, remaining_kwargs, remaining_args
 
 
+# Kinds of _ArgToken.
+_POSITIONAL = 'positional'
+_SHORT_FLAG = 'short flag'
+_LONG_FLAG = 'long flag'
+_FLAG_KINDS = frozenset([_SHORT_FLAG, _LONG_FLAG])
+
+_SHORT_FLAG_RE = re.compile(r'-[a-zA-Z](?:$|=)')
+_DASH_LETTER_RE = re.compile(r'-[a-zA-Z]')
+
+
+class _ArgToken(collections.namedtuple(
+    '_ArgToken', ['kind', 'arg', 'key', 'value'])):
+  """A command line arg, classified.
+
+  Attributes:
+    kind: _POSITIONAL (negative numbers included), _SHORT_FLAG or _LONG_FLAG.
+    arg: The arg as given, e.g. '--alpha-beta=10'.
+    key: For flags, the name up to the first '=' without leading hyphens and
+        with '-' read as '_', e.g. 'alpha_beta'. None otherwise.
+    value: For flags, the text after the first '=', or None if there is none.
+  """
+  __slots__ = ()
+
+
+def _TokenizeArgs(args):
+  """Classifies each of args once, returning a list of _ArgTokens."""
+  tokens = []
+  for argument in args:
+    if argument.startswith('--'):
+      kind = _LONG_FLAG
+    elif _SHORT_FLAG_RE.match(argument):
+      kind = _SHORT_FLAG
+    elif _DASH_LETTER_RE.match(argument):
+      kind = _LONG_FLAG
+    else:
+      tokens.append(_ArgToken(_POSITIONAL, argument, None, None))
+      continue
+
+    key, equals, value = argument.lstrip('-').partition('=')
+    tokens.append(_ArgToken(
+        kind, argument, key.replace('-', '_'), value if equals else None))
+  return tokens
+
+
 def _IsFlag(argument):
   """Determines if the argument is a flag argument.
 
@@ -954,12 +1172,12 @@ def _IsFlag(argument):
 
 def _IsSingleCharFlag(argument):
   """Determines if the argument is a single char flag (e.g. '-a')."""
-  return re.match('^-[a-zA-Z]$', argument) or re.match('^-[a-zA-Z]=', argument)
+  return _SHORT_FLAG_RE.match(argument)
 
 
 def _IsMultiCharFlag(argument):
   """Determines if the argument is a multi char flag (e.g. '--alpha')."""
-  return argument.startswith('--') or re.match('^-[a-zA-Z]', argument)
+  return argument.startswith('--') or _DASH_LETTER_RE.match(argument)
 
 
 def _ParseValue(value, index, arg, metadata):
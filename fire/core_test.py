@@ -18,7 +18,11 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import print_function
 
+import gc
+import weakref
+
 from fire import core
+from fire import inspectutils
 from fire import test_components as tc
 from fire import testutils
 from fire import trace
@@ -230,6 +234,80 @@ class CoreTest(testutils.BaseTestCase):
         core.Fire(tc.py3.lru_cache_decorated,  # pytype: disable=module-attr
                   command=['foo']), 'foo')
 
+  def testCallPlanIsReused(self):
+    self.assertEqual(core.Fire(tc.WithDefaults, command=['double', '2']), 4)
+    self.assertEqual(core.Fire(tc.WithDefaults, command=['triple', '1']), 3)
+    with mock.patch.object(inspectutils, 'GetFullArgSpec') as mock_spec:
+      self.assertEqual(core.Fire(tc.WithDefaults, command=['double', '3']), 6)
+      self.assertEqual(
+          core.Fire(tc.WithDefaults, command=['triple', '--count=2']), 6)
+    self.assertFalse(mock_spec.called)
+
+  def testCallPlanIsDroppedWithCallable(self):
+    def identity(arg):
+      return arg
+    self.assertEqual(core.Fire(identity, command=['5']), 5)
+    self.assertIn(identity, core._CALL_PLANS)  # pylint: disable=protected-access
+    ref = weakref.ref(identity)
+    del identity
+    gc.collect()
+    self.assertIsNone(ref())
+
+  def testCallPlanUnhashableCallable(self):
+    class Unhashable(object):
+      __hash__ = None
+
+      def __call__(self, alpha=0):
+        return alpha
+    self.assertEqual(core.Fire(Unhashable(), command=['--alpha=7']), 7)
+
+  def testTraceSourceIsNotLocatedUnlessShown(self):
+    with mock.patch.object(inspectutils, 'GetFileAndLine') as mock_locate:
+      self.assertEqual(
+          core.Fire(tc.WithDefaults, command=['double', '2']), 4)
+    self.assertFalse(mock_locate.called)
+
+  def testHasMember(self):
+    instance = tc.WithDefaults()
+    instance.extra = 1
+    self.assertTrue(core._HasMember(instance, 'extra'))  # pylint: disable=protected-access
+    self.assertTrue(core._HasMember(instance, 'double'))  # pylint: disable=protected-access
+    self.assertTrue(core._HasMember(tc.WithDefaults, '__init__'))  # pylint: disable=protected-access
+    self.assertFalse(core._HasMember(instance, 'missing'))  # pylint: disable=protected-access
+    self.assertTrue(core._HasMember(tc, 'WithDefaults'))  # pylint: disable=protected-access
+    self.assertIsNone(core._HasMember(mock.MagicMock(), 'double'))  # pylint: disable=protected-access
+
+  def testTokenizeArgs(self):
+    tokens = core._TokenizeArgs(  # pylint: disable=protected-access
+        ['run', '-5', '-a', '-b=2', '--alpha-beta=x=y', '-gamma', '--flag', '-'])
+    self.assertEqual(
+        [(token.kind, token.key, token.value) for token in tokens],
+        [(core._POSITIONAL, None, None),  # pylint: disable=protected-access
+         (core._POSITIONAL, None, None),  # pylint: disable=protected-access
+         (core._SHORT_FLAG, 'a', None),  # pylint: disable=protected-access
+         (core._SHORT_FLAG, 'b', '2'),  # pylint: disable=protected-access
+         (core._LONG_FLAG, 'alpha_beta', 'x=y'),  # pylint: disable=protected-access
+         (core._LONG_FLAG, 'gamma', None),  # pylint: disable=protected-access
+         (core._LONG_FLAG, 'flag', None),  # pylint: disable=protected-access
+         (core._POSITIONAL, None, None)])  # pylint: disable=protected-access
+
+  def testPositionalArgsLeaveTheRestForTheResult(self):
+    def pair(first, second):
+      return [first, second]
+    self.assertEqual(core.Fire(pair, command=['10', '20', '1']), 20)
+    self.assertEqual(core.Fire(pair, command=['10', '20', '0']), 10)
+
+  def testNonStringKeyIndexFollowsDict(self):
+    component = {1: 'one', 2: 'two'}
+    self.assertEqual(core.Fire(component, command=['2']), 'two')
+    component[3] = 'three'
+    self.assertEqual(core.Fire(component, command=['3']), 'three')
+    del component[2]
+    component[(2,)] = 'tuple'
+    self.assertEqual(core.Fire(component, command=['(2,)']), 'tuple')
+    with self.assertRaisesFireExit(2):
+      core.Fire(component, command=['2'])
+
 
 if __name__ == '__main__':
   testutils.main()
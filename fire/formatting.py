@@ -19,7 +19,6 @@ from __future__ import division
 from __future__ import print_function
 
 from fire import formatting_windows  # pylint: disable=unused-import
-import termcolor
 
 
 ELLIPSIS = '...'
@@ -33,10 +32,12 @@ def Indent(text, spaces=2):
 
 
 def Bold(text):
+  import termcolor  # pylint: disable=g-import-not-at-top
   return termcolor.colored(text, attrs=['bold'])
 
 
 def Underline(text):
+  import termcolor  # pylint: disable=g-import-not-at-top
   return termcolor.colored(text, attrs=['underline'])
 
 
@@ -68,6 +69,7 @@ def WrappedJoin(items, separator=' | ', width=80):
 
 
 def Error(text):
+  import termcolor  # pylint: disable=g-import-not-at-top
   return termcolor.colored(text, color='red', attrs=['bold'])
 
 
@@ -26,9 +26,6 @@ from fire import docstrings
 
 import six
 
-if six.PY34:
-  import asyncio  # pylint: disable=import-error,g-import-not-at-top  # pytype: disable=import-error
-
 
 class FullArgSpec(object):
   """The arguments of a function, as in Python 3's inspect.FullArgSpec."""
@@ -366,7 +363,12 @@ def GetClassAttrsDict(component):
 
 
 def IsCoroutineFunction(fn):
+  # asyncio is slow to import, so it is only consulted once something else has
+  # loaded it; until then no function can carry its @coroutine marker.
+  asyncio = sys.modules.get('asyncio')
   try:
+    if asyncio is None:
+      return six.PY34 and inspect.iscoroutinefunction(fn)
     return six.PY34 and asyncio.iscoroutinefunction(fn)
   except:  # pylint: disable=bare-except
     return False
@@ -20,6 +20,9 @@ from __future__ import print_function
 
 import argparse
 import ast
+import collections
+import keyword
+import re
 
 
 def CreateParser():
@@ -54,6 +57,21 @@ def SeparateFlagArgs(args):
   return args, []
 
 
+# Tokens that parse to themselves as strings: a word, or words joined by '.' or
+# '-', which Python reads as an attribute or a subtraction.
+_WORD_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*\Z')
+_BAREWORD_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_.-]*\Z')
+# Longer numbers are left to the AST path, which applies Python's own limits.
+_INT_RE = re.compile(r'-?(?:0|[1-9][0-9]{0,17})\Z')
+_FLOAT_RE = re.compile(r'-?[0-9]{1,18}\.[0-9]{1,18}\Z')
+_CONSTANTS = {'True': True, 'False': False, 'None': None}
+
+# Recently parsed values with immutable results, most recent last.
+_PARSE_CACHE = collections.OrderedDict()
+_PARSE_CACHE_SIZE = 256
+_IMMUTABLE_TYPES = (bool, int, float, complex, str, bytes, type(None))
+
+
 def DefaultParseValue(value):
   """The default argument parsing function used by Fire CLIs.
 
@@ -66,12 +84,84 @@ def DefaultParseValue(value):
   Returns:
     The parsed value, of the type determined most appropriate.
   """
-  # Note: _LiteralEval will treat '#' as the start of a comment.
   try:
-    return _LiteralEval(value)
-  except (SyntaxError, ValueError):
-    # If _LiteralEval can't parse the value, treat it as a string.
-    return value
+    result = _PARSE_CACHE[value]
+  except (KeyError, TypeError):
+    pass
+  else:
+    _PARSE_CACHE.move_to_end(value)
+    return result
+
+  result = _ScanValue(value)
+  if result is _NOT_SCANNED:
+    # Note: _LiteralEval will treat '#' as the start of a comment.
+    try:
+      result = _LiteralEval(value)
+    except (SyntaxError, ValueError):
+      # If _LiteralEval can't parse the value, treat it as a string.
+      result = value
+
+  if isinstance(result, _IMMUTABLE_TYPES):
+    _PARSE_CACHE[value] = result
+    if len(_PARSE_CACHE) > _PARSE_CACHE_SIZE:
+      _PARSE_CACHE.popitem(last=False)
+  return result
+
+
+_NOT_SCANNED = object()
+
+
+def _ScanValue(value):
+  """Parses the common shapes of value without building an AST.
+
+  Handles bare words (possibly joined by '.' or '-'), ints, plain decimals,
+  True, False, None and flat lists of words and numbers, each exactly as
+  _LiteralEval would.
+
+  Args:
+    value: A string from the command line.
+  Returns:
+    The parsed value, or _NOT_SCANNED if value needs the AST path.
+  """
+  if not isinstance(value, str):
+    return _NOT_SCANNED
+
+  if _BAREWORD_RE.match(value):
+    return _CONSTANTS.get(value, value)
+  scanned = _ScanScalar(value)
+  if scanned is not _NOT_SCANNED:
+    return scanned
+
+  if value[:1] == '[' and value[-1:] == ']':
+    inner = value[1:-1]
+    if not inner.strip(' '):
+      return []
+    items = []
+    for part in inner.split(','):
+      part = part.strip(' ')
+      if _WORD_RE.match(part):
+        if part in _CONSTANTS:
+          items.append(_CONSTANTS[part])
+          continue
+        if keyword.iskeyword(part):
+          return _NOT_SCANNED
+        items.append(part)
+        continue
+      item = _ScanScalar(part)
+      if item is _NOT_SCANNED:
+        return _NOT_SCANNED
+      items.append(item)
+    return items
+
+  return _NOT_SCANNED
+
+
+def _ScanScalar(value):
+  if _INT_RE.match(value):
+    return int(value)
+  if _FLOAT_RE.match(value):
+    return float(value)
+  return _NOT_SCANNED
 
 
 def _LiteralEval(value):
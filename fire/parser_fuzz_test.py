@@ -94,6 +94,25 @@ class ParserFuzzTest(testutils.BaseTestCase):
       self.assertLessEqual(distance, max_distance,
                            (distance, max_distance, uvalue, uresult))
 
+  @settings(max_examples=10000)
+  @given(st.text(alphabet='ab_019.- ,[]', min_size=1))
+  @example('t3.small')
+  @example('us-east-1')
+  @example('007')
+  @example('[a, True, -1, 2.5]')
+  @example('[a, if]')
+  @example('[a.b]')
+  def testScanValueMatchesLiteralEval(self, value):
+    # pylint: disable=protected-access
+    scanned = parser._ScanValue(value)
+    if scanned is parser._NOT_SCANNED:
+      return
+    try:
+      expected = parser._LiteralEval(value)
+    except (SyntaxError, ValueError):
+      expected = value
+    self.assertEqual(repr(scanned), repr(expected))
+
 
 if __name__ == '__main__':
   testutils.main()
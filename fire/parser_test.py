@@ -139,5 +139,25 @@ class ParserTest(testutils.BaseTestCase):
     self.assertEqual(parser.DefaultParseValue('2017-10-10'), '2017-10-10')
     self.assertEqual(parser.DefaultParseValue('1+1'), '1+1')
 
+  def testDefaultParseValueBareWordsWithDotsAndHyphens(self):
+    self.assertEqual(parser.DefaultParseValue('t3.small'), 't3.small')
+    self.assertEqual(parser.DefaultParseValue('us-east-1'), 'us-east-1')
+    self.assertEqual(parser.DefaultParseValue('[t3.small]'), '[t3.small]')
+    self.assertEqual(parser.DefaultParseValue('[a, if]'), '[a, if]')
+
+  def testDefaultParseValueCacheKeepsRecentlyUsed(self):
+    parser.DefaultParseValue('kept')
+    for n in range(parser._PARSE_CACHE_SIZE - 1):  # pylint: disable=protected-access
+      parser.DefaultParseValue('filler{}'.format(n))
+    parser.DefaultParseValue('kept')
+    parser.DefaultParseValue('evicts-oldest')
+    self.assertIn('kept', parser._PARSE_CACHE)  # pylint: disable=protected-access
+    self.assertNotIn('filler0', parser._PARSE_CACHE)  # pylint: disable=protected-access
+
+  def testDefaultParseValueRepeatedList(self):
+    first = parser.DefaultParseValue('[a, 1]')
+    first.append('changed')
+    self.assertEqual(parser.DefaultParseValue('[a, 1]'), ['a', 1])
+
 if __name__ == '__main__':
   testutils.main()
@@ -87,7 +87,8 @@ class FireTrace(object):
     """Returns whether the Fire execution encountered a Fire usage error."""
     return self.elements[-1].HasError()
 
-  def AddAccessedProperty(self, component, target, args, filename, lineno):
+  def AddAccessedProperty(self, component, target, args, filename, lineno,
+                          source=None):
     element = FireTraceElement(
         component=component,
         action=ACCESSED_PROPERTY,
@@ -95,11 +96,12 @@ class FireTrace(object):
         args=args,
         filename=filename,
         lineno=lineno,
+        source=source,
     )
     self.elements.append(element)
 
   def AddCalledComponent(self, component, target, args, filename, lineno,
-                         capacity, action=CALLED_CALLABLE):
+                         capacity, action=CALLED_CALLABLE, source=None):
     """Adds an element to the trace indicating that a component was called.
 
     Also applies to instantiating a class.
@@ -112,6 +114,8 @@ class FireTrace(object):
       lineno: The line number on which the callable is defined, or None if N/A.
       capacity: (bool) Whether the callable could have accepted additional args.
       action: The value to include as the action in the FireTraceElement.
+      source: The callable, whose filename and lineno are looked up only if
+          the trace is displayed and filename is None.
     """
     element = FireTraceElement(
         component=component,
@@ -121,6 +125,7 @@ class FireTrace(object):
         filename=filename,
         lineno=lineno,
         capacity=capacity,
+        source=source,
     )
     self.elements.append(element)
 
@@ -260,7 +265,8 @@ class FireTraceElement(object):
                filename=None,
                lineno=None,
                error=None,
-               capacity=None):
+               capacity=None,
+               source=None):
     """Instantiates a FireTraceElement.
 
     Args:
@@ -272,6 +278,8 @@ class FireTraceElement(object):
       lineno: The line number on which the action is defined, or None if N/A.
       error: The error represented by the action, or None if N/A.
       capacity: (bool) Whether the action could have accepted additional args.
+      source: The object the action is defined by. If filename is None, the
+          filename and lineno are looked up from it when first displayed.
     """
     self.component = component
     self._action = action
@@ -282,6 +290,7 @@ class FireTraceElement(object):
     self._error = error
     self._separator = False
     self._capacity = capacity
+    self._source = source
 
   def HasError(self):
     return self._error is not None
@@ -295,6 +304,13 @@ class FireTraceElement(object):
   def AddSeparator(self):
     self._separator = True
 
+  def GetFileAndLine(self):
+    """Returns the (filename, lineno) of the action, looking it up once."""
+    if self._filename is None and self._source is not None:
+      self._filename, self._lineno = inspectutils.GetFileAndLine(self._source)
+      self._source = None
+    return self._filename, self._lineno
+
   def ErrorAsStr(self):
     return ' '.join(str(arg) for arg in self._error.args)
 
@@ -306,10 +322,11 @@ class FireTraceElement(object):
       string = self._action
       if self._target is not None:
         string += ' "{target}"'.format(target=self._target)
-      if self._filename is not None:
-        path = self._filename
-        if self._lineno is not None:
-          path += ':{lineno}'.format(lineno=self._lineno)
+      filename, lineno = self.GetFileAndLine()
+      if filename is not None:
+        path = filename
+        if lineno is not None:
+          path += ':{lineno}'.format(lineno=lineno)
 
         string += ' ({path})'.format(path=path)
       return string
@@ -60,6 +60,16 @@ class FireTraceTest(testutils.BaseTestCase):
         str(t),
         '1. Initial component\n2. Called callable "cell" (sample.py:10)')
 
+  def testAddCalledComponentSource(self):
+    def run():
+      pass
+    t = trace.FireTrace('initial object')
+    t.AddCalledComponent('result', 'run', [], None, None, False,
+                         action=trace.CALLED_ROUTINE, source=run)
+    self.assertRegex(
+        str(t),
+        r'2\. Called routine "run" \(.*trace_test\.py:\d+\)$')
+
   def testAddCalledRoutine(self):
     t = trace.FireTrace('initial object')
     args = ('example', 'args')
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+#  Copyright 2024 Denis Lussier All rights reserved. #
+
+import math, heapq
+from array import array
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def unit_vector(lat, lon):
+    """(x, y, z) on the unit sphere for a latitude & longitude in degrees"""
+    la = math.radians(lat)
+    lo = math.radians(lon)
+    return (math.cos(la) * math.cos(lo), math.cos(la) * math.sin(lo), math.sin(la))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between two points"""
+    la1, lo1, la2, lo2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    h = math.sin((la2 - la1) / 2) ** 2 + \
+        math.cos(la1) * math.cos(la2) * math.sin((lo2 - lo1) / 2) ** 2
+
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+def dot_to_km(dot):
+    """Great-circle km for the dot product of two unit vectors"""
+    return EARTH_RADIUS_KM * math.acos(max(-1.0, min(1.0, dot)))
+
+
+class PointIndex:
+    """Packed unit vectors of a fixed set of points for nearest searches
+
+    Built once; a query is a single pass of dot products over the packed
+    coordinate arrays (the largest dot product is the nearest point), and
+    only the k survivors are converted to kilometres.
+    """
+
+    def __init__(self, points):
+        self.xs = array("d")
+        self.ys = array("d")
+        self.zs = array("d")
+        for lat, lon in points:
+            x, y, z = unit_vector(lat, lon)
+            self.xs.append(x)
+            self.ys.append(y)
+            self.zs.append(z)
+
+    def __len__(self):
+        return len(self.xs)
+
+    def dots(self, lat, lon):
+        x, y, z = unit_vector(lat, lon)
+        return [x * a + y * b + z * c for a, b, c in zip(self.xs, self.ys, self.zs)]
+
+    def nearest(self, lat, lon, k=None, radius_km=None, candidates=None):
+        """[(km, i), ...] nearest first, limited to k and/or radius_km
+
+        'candidates' optionally restricts the search to those point indexes.
+        """
+        dots = self.dots(lat, lon)
+        if candidates is None:
+            candidates = range(len(dots))
+
+        if radius_km is not None:
+            min_dot = math.cos(min(float(radius_km) / EARTH_RADIUS_KM, math.pi))
+            candidates = [i for i in candidates if dots[i] >= min_dot]
+
+        if k is None:
+            best = sorted(candidates, key=lambda i: -dots[i])
+        else:
+            best = heapq.nlargest(int(k), candidates, key=lambda i: dots[i])
+
+        return [(dot_to_km(dots[i]), i) for i in best]
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+#  Copyright 2024 Denis Lussier All rights reserved. #
+
+import sys, time, atexit
+
+# module --> [self ms, total ms] of every module executed since install()
+TIMES = {}
+_stack = []
+
+
+class TimedLoader:
+    """Wraps a module loader to time its exec_module (nested imports included)"""
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+
+    def __getattr__(self, attr):
+        return getattr(self.loader, attr)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        _stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            total = (time.perf_counter() - start) * 1000
+            children = _stack.pop()
+            if _stack:
+                _stack[-1] += total
+            TIMES[self.name] = [total - children, total]
+
+
+class TimingFinder:
+    """First sys.meta_path entry; hands out the other finders' specs with a TimedLoader"""
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = TimedLoader(name, spec.loader)
+
+        return spec
+
+
+def report(top=25, out=None):
+    """Slowest imports by total time, with their own (self) share"""
+    out = out or sys.stderr
+    rows = sorted(TIMES.items(), key=lambda t: -t[1][1])
+
+    out.write(f"{'Module':<40} {'Self ms':>9} {'Total ms':>9}\n")
+    for name, (own, total) in rows[:int(top)]:
+        out.write(f"{name:<40} {own:9.1f} {total:9.1f}\n")
+    out.write(f"{len(TIMES)} modules imported, {sum(t[0] for t in TIMES.values()):.1f} ms in total\n")
+    out.flush()
+
+    return
+
+
+def install(top=25):
+    """Time every import from here on; the breakdown prints (to stderr) at exit"""
+    sys.meta_path.insert(0, TimingFinder())
+    atexit.register(report, top)
+
+    return
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+
+#  Copyright 2024 Denis Lussier All rights reserved. #
+
+import os, sys, time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "lib"))
+
+import fire
+import lazy
+import config
+import metadata
+import render
+
+util = lazy.load("util")
+
+# same column order as the rows built by vm.*_node_rows()
+COLS = ["provider", "airport", "name", "state", "country", "region", "zone",
+        "public_ip", "private_ip", "id", "size"]
+
+DDL = """
+CREATE TABLE IF NOT EXISTS inventory (
+  provider    TEXT  NOT NULL,
+  airport     TEXT,
+  name        TEXT  NOT NULL,
+  state       TEXT,
+  country     TEXT,
+  region      TEXT  NOT NULL,
+  zone        TEXT,
+  public_ip   TEXT,
+  private_ip  TEXT,
+  id          TEXT  NOT NULL,
+  size        TEXT,
+  first_seen  REAL  NOT NULL,
+  last_seen   REAL  NOT NULL,
+  changed     REAL  NOT NULL,
+  PRIMARY KEY (provider, id)
+);
+CREATE INDEX IF NOT EXISTS inventory_name     ON inventory(name);
+CREATE INDEX IF NOT EXISTS inventory_provider ON inventory(provider, region);
+CREATE INDEX IF NOT EXISTS inventory_region   ON inventory(region);
+CREATE INDEX IF NOT EXISTS inventory_state    ON inventory(state);
+CREATE INDEX IF NOT EXISTS inventory_id       ON inventory(id);
+
+CREATE TABLE IF NOT EXISTS inventory_syncs (
+  provider    TEXT  NOT NULL,
+  region      TEXT  NOT NULL,
+  synced      REAL  NOT NULL,
+  PRIMARY KEY (provider, region)
+);
+"""
+
+_ready = False
+
+
+def connect():
+    """Metadata DB connection with the inventory tables in place"""
+    global _ready
+
+    cL = metadata.connect()
+    if not _ready:
+        cL.executescript(DDL)
+        _ready = True
+
+    return cL
+
+
+def target_region(provider, region):
+    """Region key a listing covers ('' for account wide EQN & AKM listings)"""
+    if provider == "aws":
+        return region or ""
+
+    return ""
+
+
+def max_age():
+    """Staleness bound (seconds) for answering lookups from the inventory"""
+    common = config.get_sections().get("common", {})
+    try:
+        return float(common.get("inventory_max_age", 0))
+    except ValueError:
+        util.exit_message(f"invalid inventory_max_age '{common['inventory_max_age']}'")
+
+
+def is_fresh(provider, region, age=None):
+    """True if (provider, region) was fully synced within 'age' seconds"""
+    if age is None:
+        age = max_age()
+    if not age:
+        return False
+
+    cursor = connect().cursor()
+    cursor.execute("SELECT synced FROM inventory_syncs WHERE provider = ? AND region = ?",
+                   (config.alias(provider), target_region(config.alias(provider), region)))
+    data = cursor.fetchone()
+
+    return bool(data) and (time.time() - data[0]) <= float(age)
+
+
+def get_node(provider, region, name):
+    """Inventory row (as a dict) for a live node name, or None"""
+    provider = config.alias(provider)
+    sql = f"SELECT {', '.join(COLS)} FROM inventory WHERE name = ? AND provider = ?"
+    parms = [name, provider]
+    if provider == "aws" and region:
+        sql = sql + " AND region = ?"
+        parms.append(region)
+
+    cursor = connect().cursor()
+    cursor.execute(sql + " AND state NOT IN ('terminated', 'unknown')", parms)
+    data = cursor.fetchone()
+    if not data:
+        return None
+
+    return dict(zip(COLS, data))
+
+
+def upsert(nl, listed):
+    """Merge node rows into the inventory; only changed rows are rewritten
+
+    'listed' holds the (provider, region) targets that were listed completely;
+    inventory rows of those targets that were not seen again are deleted.
+    Returns (inserted, updated, deleted) counts.
+    """
+
+    now = time.time()
+    cL = connect()
+    cursor = cL.cursor()
+
+    cursor.execute(f"SELECT {', '.join(COLS)} FROM inventory")
+    existing = {(r[0], r[9]): r for r in cursor.fetchall()}
+
+    inserts = []
+    updates = []
+    seen = []
+    for n in nl:
+        row = tuple(None if c is None else str(c) for c in n)
+        key = (row[0], row[9])
+        old = existing.pop(key, None)
+        if old is None:
+            inserts.append(row + (now, now, now))
+        elif old != row:
+            updates.append(row[1:9] + row[10:] + (now, now) + key)
+        else:
+            seen.append((now,) + key)
+
+    targets = {(p, target_region(p, r)) for p, r in listed}
+    deletes = [k for k, r in existing.items() if (r[0], target_region(r[0], r[5])) in targets]
+
+    with cL:
+        cL.executemany(
+            f"INSERT INTO inventory ({', '.join(COLS)}, first_seen, last_seen, changed) "
+            f"VALUES ({', '.join(['?'] * (len(COLS) + 3))})", inserts)
+        cL.executemany(
+            "UPDATE inventory SET airport = ?, name = ?, state = ?, country = ?, region = ?, "
+            "zone = ?, public_ip = ?, private_ip = ?, size = ?, last_seen = ?, changed = ? "
+            "WHERE provider = ? AND id = ?", updates)
+        cL.executemany(
+            "UPDATE inventory SET last_seen = ? WHERE provider = ? AND id = ?", seen)
+        cL.executemany(
+            "DELETE FROM inventory WHERE provider = ? AND id = ?", deletes)
+        cL.executemany(
+            "INSERT OR REPLACE INTO inventory_syncs VALUES (?, ?, ?)",
+            [(p, r, now) for p, r in targets])
+
+    return (len(inserts), len(updates), len(deletes))
+
+
+def sync(provider=None, timeout=60):
+    """Sync the local node inventory from the cloud providers"""
+    import vm
+
+    providers = [config.alias(provider)] if provider else None
+    nl, failed, listed = vm.list_all_nodes(timeout, providers)
+    inserted, updated, deleted = upsert(nl, listed)
+
+    util.message(f"inventory sync: {len(nl)} nodes, {inserted} new, "
+                 f"{updated} changed, {deleted} removed")
+    for p, r, reason in failed:
+        target = f"{p}:{r}" if r else p
+        util.message(f"  # {target} {reason}", "warning")
+
+    return
+
+
+def list_inventory(provider=None, region=None, state=None, name=None, pretty=True, format="table"):
+    """List nodes in the local inventory"""
+
+    wr = []
+    parms = []
+    for col, val in (("provider", provider), ("region", region),
+                     ("state", state), ("name", name)):
+        if val:
+            wr.append(f"{col} = ?")
+            parms.append(config.alias(val) if col == "provider" else val)
+
+    sql = f"SELECT {', '.join(COLS)}, last_seen FROM inventory"
+    if wr:
+        sql = sql + " WHERE " + " AND ".join(wr)
+
+    cursor = connect().cursor()
+    cursor.execute(sql + " ORDER BY provider, airport, name", parms)
+    nl = []
+    for d in cursor.fetchall():
+        last_seen = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(d[11]))
+        nl.append(list(d[:11]) + [last_seen])
+
+    if not pretty:
+        return(nl)
+
+    render.emit(["Provider", "Airport", "Name", "Status", "Country", "Region", "Zone", "Public IP", "Private IP", "ID", "Size", "Last Seen"], nl,
+                format, {"Name": "l", "Size": "l", "Public IP": "l", "Private IP": "l", "Region": "l"})
+
+    return
+
+
+COMMANDS = \
+    {
+        "sync": sync,
+        "list": list_inventory,
+    }
+
+if __name__ == "__main__":
+    fire.Fire(COMMANDS)
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+#  Copyright 2024 Denis Lussier All rights reserved. #
+
+import sys
+import importlib.util
+
+# modules handed out by load(), for ready()
+_modules = []
+
+
+def load(name):
+    """Module 'name', bound now but only executed when an attribute is first used
+
+    Lets a command module import its heavy helpers at the top, as usual,
+    without 'kloud vm --help' or a metadata lookup paying for them.
+    """
+
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    _modules.append(module)
+
+    return module
+
+
+def ready():
+    """Execute every module load() deferred, on the calling thread
+
+    Before 3.12 a LazyLoader module is not safe to execute from two threads
+    at once, so call this on the main thread before handing work to a pool.
+    """
+
+    for module in _modules:
+        getattr(module, "__name__")
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+
+#  Copyright 2024 Denis Lussier All rights reserved. #
+
+import os, sys, sqlite3, threading
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "lib"))
+
+import lazy
+
+util = lazy.load("util")
+
+_lock = threading.Lock()
+_conn = None
+_index = None
+
+
+def connect():
+    """Shared connection to the kloud metadata DB (opened on first use)"""
+    global _conn
+
+    with _lock:
+        if _conn is None:
+            _conn = sqlite3.connect(util.MY_LITE, check_same_thread=False)
+
+    return _conn
+
+
+class RegionIndex:
+    """Bidirectional in-memory maps over the airport_regions table
+
+    Loaded with one query per table, so a key that misses the maps is not
+    in the table either and comes back as None.
+    """
+
+    def __init__(self, cL):
+        self.regions = {}     # (provider, airport) --> region
+        self.airports = {}    # (provider, region)  --> airport
+        self.region_set = set()
+        self.parent_set = set()
+        self.airport_set = set()
+        self.active = {}      # provider --> [(airport, region), ...]
+
+        cursor = cL.cursor()
+        cursor.execute("SELECT provider, airport, region, parent, is_active FROM airport_regions")
+        for provider, airport, region, parent, is_active in cursor.fetchall():
+            self.regions[(provider, airport)] = region
+            self.airports.setdefault((provider, region), airport)
+            self.region_set.add(region)
+            if parent:
+                self.parent_set.add(parent)
+            if is_active == "Y":
+                self.active.setdefault(provider, []).append((airport, region))
+
+        cursor.execute("SELECT airport FROM airports")
+        self.airport_set.update(r[0] for r in cursor.fetchall())
+
+    def get_region(self, provider, airport):
+        return self.regions.get((provider, airport))
+
+    def get_airport(self, provider, region):
+        return self.airports.get((provider, region))
+
+    def active_regions(self, provider):
+        return self.active.get(provider, [])
+
+    def is_region(self, region):
+        return region in self.region_set
+
+    def is_parent(self, parent):
+        return parent in self.parent_set
+
+    def is_airport(self, airport):
+        return airport in self.airport_set
+
+
+def get_index():
+    """The process wide RegionIndex (built on first use)"""
+    global _index
+
+    if _index is None:
+        cL = connect()
+        with _lock:
+            if _index is None:
+                _index = RegionIndex(cL)
+
+    return _index
+
+
+# BUILDER #################################################################
+SQL_FILE = os.path.join(os.path.dirname(__file__), "etc", "metadata.sql")
+
+# tables loaded from metadata.sql, parents before children
+TABLES = ["providers", "geos", "countries", "airports", "airport_regions"]
+
+# bump SCHEMA_VERSION whenever INDEXES or SEARCH_DDL changes so existing DBs pick it up
+SCHEMA_VERSION = 2
+INDEXES = """
+CREATE INDEX IF NOT EXISTS countries_geo_idx          ON countries (geo);
+CREATE INDEX IF NOT EXISTS airports_country_idx       ON airports (country);
+CREATE INDEX IF NOT EXISTS airport_regions_airport_idx ON airport_regions (airport);
+CREATE INDEX IF NOT EXISTS airport_regions_region_idx ON airport_regions (region, provider);
+"""
+
+# 'airport search' text per (provider, airport) & its trigram index
+SEARCH_DDL = """
+DROP TABLE IF EXISTS airport_trigrams;
+DROP TABLE IF EXISTS airport_search;
+
+CREATE TABLE airport_search (
+  id          INTEGER  NOT NULL PRIMARY KEY,
+  provider    TEXT     NOT NULL,
+  airport     TEXT     NOT NULL,
+  region      TEXT     NOT NULL,
+  area        TEXT     NOT NULL,
+  country     TEXT     NOT NULL,
+  country_nm  TEXT     NOT NULL
+);
+
+CREATE TABLE airport_trigrams (
+  gram        TEXT     NOT NULL,
+  id          INTEGER  NOT NULL,
+  PRIMARY KEY (gram, id)
+) WITHOUT ROWID;
+"""
+
+BUILD_DDL = """
+CREATE TABLE IF NOT EXISTS metadata_build (
+  source      TEXT  NOT NULL PRIMARY KEY,
+  sha256      TEXT  NOT NULL,
+  built       REAL  NOT NULL
+)
+"""
+
+
+def normalize(text):
+    """Lower case words of text, split on anything but letters & digits"""
+    return " ".join("".join(c if c.isalnum() else " " for c in str(text).lower()).split())
+
+
+def trigrams(text):
+    """Distinct 3-letter grams of the words in text, each word padded by a blank
+
+    The padding makes word starts & ends (and 1-2 letter words) grams of
+    their own, so 'fra' matches ' fr' & 'fra' of 'Frankfurt'.
+    """
+    grams = set()
+    for w in normalize(text).split():
+        w = f" {w} "
+        grams.update(w[i:i + 3] for i in range(len(w) - 2))
+
+    return grams
+
+
+def build_search(dst):
+    """(Re)build the airport_search table & its trigram index from the data"""
+    for ddl in SEARCH_DDL.strip().split(";"):
+        if ddl.strip():
+            dst.execute(ddl)
+
+    rows = dst.execute(
+        "SELECT ar.provider, a.airport, ar.region, a.airport_area, c.country, c.country_nm"
+        "  FROM airport_regions ar, airports a, countries c"
+        " WHERE ar.airport = a.airport AND a.country = c.country").fetchall()
+    dst.executemany("INSERT INTO airport_search VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(i,) + tuple(r) for i, r in enumerate(rows, 1)])
+    dst.executemany("INSERT INTO airport_trigrams VALUES (?, ?)",
+                    [(g, i) for i, r in enumerate(rows, 1) for g in trigrams(" ".join(r[1:]))])
+
+    return len(rows)
+
+
+def schema_sql(cL, kind):
+    """{name: CREATE statement} of the tables or views in a DB"""
+    cursor = cL.cursor()
+    cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = ?", (kind,))
+
+    return dict(cursor.fetchall())
+
+
+def same_sql(a, b):
+    return a is not None and b is not None and a.split() == b.split()
+
+
+def primary_key(cL, table):
+    cursor = cL.cursor()
+    cursor.execute(f"PRAGMA table_info({table})")
+    cols = cursor.fetchall()
+    pk = [c[1] for c in sorted(cols, key=lambda c: c[5]) if c[5]]
+
+    return ([c[1] for c in cols], pk)
+
+
+def table_delta(src, dst, table):
+    """(rows to upsert, primary keys to delete) that turn dst's table into src's"""
+    cols, pk = primary_key(src, table)
+    at = [cols.index(k) for k in pk]
+
+    want = {tuple(r[i] for i in at): r for r in src.execute(f"SELECT * FROM {table}")}
+    have = {tuple(r[i] for i in at): r for r in dst.execute(f"SELECT * FROM {table}")}
+
+    upserts = [r for k, r in want.items() if have.get(k) != r]
+    deletes = [k for k in have if k not in want]
+
+    return (upserts, deletes)
+
+
+def apply_changes(src, dst):
+    """Migrate dst to src's schema & data; returns {table: (upserted, deleted)}"""
+    changes = {}
+
+    want_tables = schema_sql(src, "table")
+    have_tables = schema_sql(dst, "table")
+    want_views = schema_sql(src, "view")
+    have_views = schema_sql(dst, "view")
+
+    # views read the tables, so they go first & come back last
+    for view in have_views:
+        if not same_sql(have_views[view], want_views.get(view)):
+            dst.execute(f"DROP VIEW {view}")
+
+    rebuilt = [t for t in TABLES if not same_sql(have_tables.get(t), want_tables[t])]
+    for table in reversed(rebuilt):
+        dst.execute(f"DROP TABLE IF EXISTS {table}")
+    for table in rebuilt:
+        dst.execute(want_tables[table])
+
+    deltas = {t: table_delta(src, dst, t) for t in TABLES}
+
+    # children lose their rows before parents, parents gain theirs first
+    for table in reversed(TABLES):
+        cols, pk = primary_key(src, table)
+        where = " AND ".join(f"{k} = ?" for k in pk)
+        dst.executemany(f"DELETE FROM {table} WHERE {where}", deltas[table][1])
+    for table in TABLES:
+        upserts, deletes = deltas[table]
+        if upserts:
+            marks = ", ".join("?" * len(upserts[0]))
+            dst.executemany(f"INSERT OR REPLACE INTO {table} VALUES ({marks})", upserts)
+        changes[table] = (len(upserts), len(deletes))
+
+    for view in want_views:
+        if not same_sql(have_views.get(view), want_views[view]):
+            dst.execute(want_views[view])
+
+    return {t: c for t, c in changes.items() if any(c)}
+
+
+def build(db=None, sql=SQL_FILE, force=False):
+    """Bring the metadata DB up to date with etc/metadata.sql (only the deltas)
+
+    metadata.sql is loaded into an in-memory DB and diffed against 'db'
+    table by table on primary key; schema changes, new indexes (tracked in
+    PRAGMA user_version) and the changed rows are then applied in a single
+    transaction followed by ANALYZE.  A new DB is built aside and renamed
+    into place, so a failed build never leaves a partial file behind.
+    """
+
+    import hashlib, time
+
+    db = db or util.MY_LITE
+    with open(sql) as f:
+        script = f.read()
+    sha256 = hashlib.sha256(script.encode()).hexdigest()
+
+    target = db if os.path.exists(db) else db + ".tmp"
+    if target != db:
+        # left by a build that was killed; never build on top of it
+        for leftover in (target, target + "-journal"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    dst = sqlite3.connect(target, isolation_level=None)
+    try:
+        dst.execute("BEGIN IMMEDIATE")
+        dst.execute(BUILD_DDL)
+        version = dst.execute("PRAGMA user_version").fetchone()[0]
+        data = dst.execute("SELECT sha256 FROM metadata_build WHERE source = ?", ("metadata.sql",)).fetchone()
+        if not force and version == SCHEMA_VERSION and data and data[0] == sha256:
+            dst.execute("ROLLBACK")
+            dst.close()
+            util.message(f"  # {db} is up to date (version {version})")
+            return
+
+        src = sqlite3.connect(":memory:")
+        src.executescript(script)
+        changes = apply_changes(src, dst)
+        src.close()
+
+        if version != SCHEMA_VERSION or changes:
+            for ddl in INDEXES.strip().splitlines():
+                dst.execute(ddl)
+            build_search(dst)
+            dst.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            dst.execute("ANALYZE")
+        dst.execute("INSERT OR REPLACE INTO metadata_build VALUES (?, ?, ?)",
+                    ("metadata.sql", sha256, time.time()))
+        dst.execute("COMMIT")
+    except Exception as e:
+        if dst.in_transaction:
+            dst.execute("ROLLBACK")
+        dst.close()
+        if target != db:
+            os.remove(target)
+        util.exit_message(f"metadata build failed, {db} left unchanged: {e}", 1)
+
+    dst.close()
+    if target != db:
+        os.replace(target, db)
+
+    for table, (upserted, deleted) in changes.items():
+        util.message(f"  # {table:<16} {upserted} upserted, {deleted} deleted")
+    util.message(f"  # {db} at version {SCHEMA_VERSION}")
+
+    return
+
+
+COMMANDS = \
+    {
+        "build": build,
+    }
+
+if __name__ == "__main__":
+    import fire
+
+    fire.Fire(COMMANDS)
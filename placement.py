@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+
+#  Copyright 2024 Denis Lussier All rights reserved. #
+
+import os, sys, time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "lib"))
+
+import fire
+import lazy
+import geo
+import airport
+
+util = lazy.load("util")
+
+# light in fibre covers ~200 km per ms; estimate round trips from distance
+FIBER_KM_PER_MS = 200.0
+
+# pairwise great-circle km between every v_airports row (built on first use)
+_matrix = None
+
+
+def est_rtt_ms(km):
+    return 2 * km / FIBER_KM_PER_MS
+
+
+def distance_matrix():
+    global _matrix
+
+    if _matrix is None:
+        rows, index = airport.region_points()
+        xs, ys, zs = index.xs, index.ys, index.zs
+        _matrix = []
+        for i in range(len(rows)):
+            x, y, z = xs[i], ys[i], zs[i]
+            _matrix.append([geo.dot_to_km(x * a + y * b + z * c) for a, b, c in zip(xs, ys, zs)])
+
+    return _matrix
+
+
+def candidates(providers, distinct_airports=False):
+    """Row indexes of the regions a plan may use
+
+    By default every provider's region is a candidate, so a plan can mix
+    clouds at one airport.  With distinct_airports only one region per
+    airport is kept (from the first provider in 'providers' that has it),
+    which shrinks the search but gives up that provider diversity.
+    """
+    rows, index = airport.region_points()
+    rank = {p: n for n, p in enumerate(providers)}
+
+    best = {}
+    for i, a in enumerate(rows):
+        if a[6] not in rank:
+            continue
+        key = a[2] if distinct_airports else (a[2], a[6])
+        if key not in best or rank[a[6]] < rank[rows[best[key]][6]]:
+            best[key] = i
+
+    return sorted(best.values())
+
+
+def greedy(dist, cands, country, count, min_countries, bound):
+    """Best placement grown greedily from every seed (an initial upper bound)"""
+    best = (bound, None)
+    for seed in cands:
+        chosen = [seed]
+        countries = {country[seed]}
+        diam = 0.0
+        while len(chosen) < count:
+            must_add_country = (min_countries - len(countries)) >= (count - len(chosen))
+            pick = None
+            for j in cands:
+                if j in chosen or (must_add_country and country[j] in countries):
+                    continue
+                d = max(diam, max(dist[j][c] for c in chosen))
+                if pick is None or d < pick[0]:
+                    pick = (d, j)
+            if pick is None or pick[0] >= best[0]:
+                break
+            diam = pick[0]
+            chosen.append(pick[1])
+            countries.add(country[pick[1]])
+        if len(chosen) == count and len(countries) >= min_countries and diam < best[0]:
+            best = (diam, chosen)
+
+    return best
+
+
+def search(dist, cands, country, count, min_countries, max_km=None, time_limit=1.0):
+    """Placement of 'count' regions minimizing the largest pairwise distance
+
+    Branch & bound over the candidates: a branch only keeps regions closer
+    than the best diameter found so far to every chosen region, and is cut
+    as soon as it can no longer fill 'count' slots or reach 'min_countries'.
+    Returns (diameter, [row indexes]) or (bound, None) if nothing fits.
+    """
+
+    bound = float("inf") if max_km is None else float(max_km) + 1e-9
+    best = list(greedy(dist, cands, country, count, min_countries, bound))
+    deadline = time.monotonic() + time_limit
+
+    def branch(chosen, diam, countries, pool):
+        if len(chosen) == count:
+            if len(countries) >= min_countries and diam < best[0]:
+                best[0], best[1] = diam, list(chosen)
+            return
+        if len(chosen) + len(pool) < count:
+            return
+        if len(countries | {country[j] for j in pool}) < min_countries:
+            return
+        if time.monotonic() > deadline:
+            return
+
+        for n, i in enumerate(pool):
+            if len(chosen) + len(pool) - n < count:
+                return
+            d = max([diam] + [dist[i][c] for c in chosen])
+            if d >= best[0]:
+                continue
+            limit = best[0]
+            rest = [j for j in pool[n + 1:] if dist[i][j] < limit]
+            chosen.append(i)
+            branch(chosen, d, countries | {country[i]}, rest)
+            chosen.pop()
+
+    branch([], 0.0, frozenset(), list(cands))
+
+    return (best[0], best[1])
+
+
+def plan_cluster(count, providers="aws,azr,gcp,eqn,akm", min_countries=1, max_km=None,
+                 prefix="n", distinct_airports=False, time_limit=1.0, pretty=True):
+    """Plan a cluster's placement for the lowest worst-case latency
+
+    --distinct-airports keeps one provider per airport (the first listed):
+    a faster search, but co-located nodes then all share one cloud.
+    """
+
+    if isinstance(providers, (list, tuple)):
+        pl = [str(p) for p in providers]
+    else:
+        pl = [p.strip() for p in str(providers).split(",") if p.strip()]
+
+    count = int(count)
+    if count < 1:
+        util.exit_message("count must be at least 1")
+    if int(min_countries) > count:
+        util.exit_message("min_countries cannot exceed count")
+
+    rows, index = airport.region_points()
+    dist = distance_matrix()
+    cands = candidates(pl, distinct_airports)
+    country = {i: rows[i][1] for i in cands}
+
+    diam, chosen = search(dist, cands, country, count, int(min_countries), max_km, float(time_limit))
+    if chosen is None:
+        util.exit_message(f"no placement of {count} nodes fits those constraints")
+
+    triplets = []
+    pl = []
+    for n, i in enumerate(chosen, 1):
+        a = rows[i]
+        worst = max([0.0] + [dist[i][j] for j in chosen if j != i])
+        triplets.append(f"{a[6]}:{a[2]}:{prefix}{n}")
+        pl.append([f"{prefix}{n}", a[6], a[2], a[3], a[1], a[7], round(worst), round(est_rtt_ms(worst), 1)])
+
+    if not pretty:
+        return(",".join(triplets))
+
+    from prettytable import PrettyTable
+
+    p = PrettyTable()
+    p.field_names = ["Name", "Provider", "Airport", "Area", "Country", "Region", "Max Km", "Max RTT ms"]
+    p.align["Name"] = "l"
+    p.align["Area"] = "l"
+    p.align["Region"] = "l"
+    p.align["Max Km"] = "r"
+    p.align["Max RTT ms"] = "r"
+    p.add_rows(pl)
+    print(p)
+    util.message(f"  # worst case {round(diam)} km (~{est_rtt_ms(diam):.1f} ms round trip)")
+    print(",".join(triplets))
+
+    return
+
+
+COMMANDS = \
+    {
+        "plan": plan_cluster,
+    }
+
+if __name__ == "__main__":
+    fire.Fire(COMMANDS)
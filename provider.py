@@ -2,8 +2,12 @@
 
 #  Copyright 2024 Denis Lussier All rights reserved. #
 
+import os, sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "lib"))
+
 import fire
-from prettytable import PrettyTable
+import render
 
 PROVIDERS = \
     [
@@ -14,21 +18,19 @@ PROVIDERS = \
         ["gcp", "gce",          "Google Cloud Platform"],
     ]
 
-def list_providers():
+def list_providers(format="table"):
     """Supported Cloud Provider List"""
 
-    p = PrettyTable()
-    p.field_names = ["Provider", "Libcloud Name", "Description"]
-    p.add_rows(PROVIDERS)
-    p.align["Cloud Name"] = "l"
-    p.align["Description"] = "l"
-    print(p)
+    render.emit(["Provider", "Libcloud Name", "Description"], PROVIDERS, format,
+                {"Description": "l"})
 
     return
 
+
+COMMANDS = \
+    {
+        "list": list_providers,
+    }
+
 if __name__ == "__main__":
-    fire.Fire(
-        {
-            "list": list_providers,
-        }
-    )
+    fire.Fire(COMMANDS)
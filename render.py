@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+#  Copyright 2024 Denis Lussier All rights reserved. #
+
+import os, sys, io, json, contextlib
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "lib"))
+
+import lazy
+
+util = lazy.load("util")
+
+FORMATS = ["table", "json", "ndjson", "csv"]
+
+# outputs up to this many rows still go through PrettyTable
+PRETTY_MAX = 200
+
+# rows held back to size the columns when no widths are declared
+LOOKAHEAD = 100
+
+
+def cell(val, float_format=None):
+    if val is None:
+        return ""
+    if float_format and isinstance(val, float):
+        return f"{val:{float_format}f}"
+
+    return str(val)
+
+
+class StreamTable:
+    """Fixed-width table printed row by row, in PrettyTable's layout
+
+    Column widths come from the declared 'widths' (the header is printed
+    at once) or from the first 'lookahead' rows.  Once the header is out the
+    widths are fixed: a longer cell is cut to fit, ending in '...', so every
+    row lines up with the header and the closing rule.
+    """
+
+    def __init__(self, field_names, align=None, widths=None, float_format=None,
+                 lookahead=LOOKAHEAD, out=None):
+        self.field_names = list(field_names)
+        self.align = align or {}
+        self.float_format = float_format
+        self.lookahead = lookahead
+        self.out = out or sys.stdout
+        self.held = []
+        self.started = False
+        self.widths = [len(f) for f in self.field_names]
+        if widths:
+            for n, f in enumerate(self.field_names):
+                self.widths[n] = max(self.widths[n], widths.get(f, 0))
+            self.start()
+
+    def rule(self):
+        return "+" + "+".join("-" * (w + 2) for w in self.widths) + "+\n"
+
+    def line(self, cells):
+        parts = []
+        for n, c in enumerate(cells):
+            w = self.widths[n]
+            a = self.align.get(self.field_names[n], "c")
+            if a == "l":
+                parts.append(c.ljust(w))
+            elif a == "r":
+                parts.append(c.rjust(w))
+            else:
+                parts.append(c.center(w))
+
+        return "| " + " | ".join(parts) + " |\n"
+
+    def start(self):
+        self.started = True
+        self.out.write(self.rule() + self.line(self.field_names) + self.rule())
+        if self.held:
+            self.write(self.held)
+            self.held = []
+
+    def fit(self, c, w):
+        if len(c) <= w:
+            return c
+        if w <= 3:
+            return c[:w]
+
+        return c[:w - 3] + "..."
+
+    def write(self, rows):
+        buf = []
+        for cells in rows:
+            if len(cells) < len(self.widths):
+                cells = cells + [""] * (len(self.widths) - len(cells))
+            buf.append(self.line([self.fit(c, w) for c, w in zip(cells, self.widths)]))
+        self.out.write("".join(buf))
+        self.out.flush()
+
+    def add_rows(self, rows):
+        rows = [[cell(v, self.float_format) for v in r] for r in rows]
+
+        if self.started:
+            self.write(rows)
+            return
+
+        for cells in rows:
+            for n, c in enumerate(cells):
+                if n < len(self.widths) and len(c) > self.widths[n]:
+                    self.widths[n] = len(c)
+        self.held.extend(rows)
+        if len(self.held) >= self.lookahead:
+            self.start()
+
+    def add_row(self, row):
+        self.add_rows([row])
+
+    def close(self):
+        if not self.started:
+            self.start()
+        self.out.write(self.rule())
+        self.out.flush()
+
+
+def print_table(field_names, rows, align=None, widths=None, float_format=None):
+    """Print rows (a list or an iterable of row batches) as a table
+
+    Small lists are rendered by PrettyTable; large lists and batch
+    iterables are streamed through a StreamTable as they arrive.
+    """
+
+    if isinstance(rows, list) and len(rows) <= PRETTY_MAX:
+        from prettytable import PrettyTable
+
+        p = PrettyTable()
+        p.field_names = field_names
+        if float_format:
+            p.float_format = float_format
+        for f, a in (align or {}).items():
+            p.align[f] = a
+        p.add_rows(rows)
+        print(p)
+        return
+
+    t = StreamTable(field_names, align, widths, float_format)
+    if isinstance(rows, list):
+        t.add_rows(rows)
+    else:
+        for batch in rows:
+            t.add_rows(batch)
+    t.close()
+
+    return
+
+
+def message(msg, level="info", format="table"):
+    """util.message, sent to stderr when stdout carries json/ndjson/csv data"""
+    if format == "table":
+        return util.message(msg, level)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        util.message(msg, level)
+
+
+def prompt(text, format="table"):
+    """input() whose prompt stays off stdout when it carries json/ndjson/csv data"""
+    if format == "table":
+        return input(text)
+
+    sys.stderr.write(text)
+    sys.stderr.flush()
+
+    return input()
+
+
+def field_key(name):
+    """JSON key for a table column ('Public IP' --> 'public_ip')"""
+    return name.lower().replace(" / ", "_").replace(" ", "_")
+
+
+def emit(field_names, rows, format="table", align=None, widths=None, float_format=None, out=None):
+    """Write rows (a list or an iterable of row batches) in an output format
+
+    Only 'table' goes through PrettyTable or a StreamTable; the other
+    formats are encoded a whole batch at a time into one write.
+    """
+
+    if format not in FORMATS:
+        util.exit_message(f"Invalid format '{format}', must be one of {', '.join(FORMATS)}")
+
+    if format == "table":
+        return print_table(field_names, rows, align, widths, float_format)
+
+    out = out or sys.stdout
+    keys = [field_key(f) for f in field_names]
+    batches = [rows] if isinstance(rows, list) else rows
+
+    if format == "csv":
+        import csv
+
+        buf = io.StringIO()
+        w = csv.writer(buf, lineterminator="\n")
+        w.writerow(keys)
+        for batch in batches:
+            w.writerows(batch)
+            out.write(buf.getvalue())
+            out.flush()
+            buf.seek(0)
+            buf.truncate()
+    elif format == "ndjson":
+        for batch in batches:
+            out.write("".join(json.dumps(dict(zip(keys, r)), default=str) + "\n" for r in batch))
+            out.flush()
+    else:
+        sep = "[\n"
+        for batch in batches:
+            if not batch:
+                continue
+            out.write(sep + ",\n".join(json.dumps(dict(zip(keys, r)), default=str) for r in batch))
+            out.flush()
+            sep = ",\n"
+        out.write("[]\n" if sep == "[\n" else "\n]\n")
+        out.flush()
+
+    return
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+#  Copyright 2024 Denis Lussier All rights reserved. #
+
+import os, sys, bisect
+from array import array
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "lib"))
+
+import fire
+import lazy
+import config
+import catalog
+import render
+
+util = lazy.load("util")
+
+# where each provider's libcloud NodeSize keeps its cpu count
+CPU_KEYS = \
+    {
+        "aws": "vcpu",
+        "eqn": "cpus",
+        "akm": "vcpus",
+    }
+
+# providers whose libcloud NodeSize reports disk in MB (the others use GB)
+DISK_IN_MB = ["akm"]
+
+# the cross-cloud size table, sorted by price (built on first use)
+_table = None
+
+
+def as_number(val):
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize(provider, region, s):
+    """[provider, region, size, cpu, ram gb, disk, bandwidth, price] for a NodeSize"""
+    provider = config.alias(provider)
+
+    price = s.price
+    if price is None:
+        price = 0
+    ram = s.ram
+    if ram is None:
+        ram = 0
+    disk = s.disk
+    if disk is None:
+        disk = 0
+    elif provider in DISK_IN_MB:
+        disk = round(disk/1024)
+    bandwidth = s.bandwidth
+    if bandwidth is None or str(bandwidth) == "0":
+        bandwidth = ""
+    cpu = (s.extra or {}).get(CPU_KEYS.get(provider, "vcpus"))
+    if cpu is None:
+        cpu = ""
+
+    return [provider, region or "", s.id, cpu, round(ram/1024), disk, bandwidth, price]
+
+
+class SizeTable:
+    """Columnar view of every cached size catalog, sorted by hourly price
+
+    A query cuts the price column with a binary search and scans the
+    cheaper prefix, so the cheapest fits come out first and the scan stops
+    as soon as 'limit' of them are found.
+    """
+
+    def __init__(self, rows):
+        rows = sorted(rows, key=lambda r: float(r[7]))
+        self.rows = rows
+        self.cpu = array("d", [as_number(r[3]) or 0 for r in rows])
+        self.ram = array("d", [as_number(r[4]) or 0 for r in rows])
+        self.disk = array("d", [as_number(r[5]) or 0 for r in rows])
+        self.price = array("d", [float(r[7]) for r in rows])
+        self.provider = [r[0] for r in rows]
+
+    def find(self, cpu=0, ram=0, disk=0, max_price=None, providers=None, limit=10):
+        end = len(self.rows)
+        if max_price is not None:
+            end = bisect.bisect_right(self.price, float(max_price))
+
+        found = []
+        for i in range(end):
+            if self.price[i] <= 0:
+                continue
+            if self.cpu[i] < cpu or self.ram[i] < ram or self.disk[i] < disk:
+                continue
+            if providers and self.provider[i] not in providers:
+                continue
+            found.append(self.rows[i])
+            if limit and len(found) >= int(limit):
+                break
+
+        return found
+
+
+def get_table():
+    global _table
+
+    if _table is None:
+        cursor = catalog.connect().cursor()
+        cursor.execute("SELECT provider, region, data FROM catalog WHERE kind = 'sizes'")
+        rows = []
+        for provider, region, data in cursor.fetchall():
+            # EQN & AKM sizes are cached account wide, not per region
+            rows.append(normalize(provider, region or "all", catalog.from_json("sizes", data, None)))
+        _table = SizeTable(rows)
+
+    return _table
+
+
+def find_sizes(cpu=0, ram=0, disk=0, max_price=None, provider=None, limit=10, pretty=True, format="table"):
+    """Cheapest sizes across clouds with at least --cpu, --ram (GB) & --disk (GB)
+
+    AWS sizes are listed per region; EQN & AKM offer theirs in every region
+    and show 'all' as their region.
+    """
+
+    if isinstance(provider, (list, tuple)):
+        providers = {config.alias(str(p)) for p in provider}
+    elif provider:
+        providers = {config.alias(p.strip()) for p in str(provider).split(",")}
+    else:
+        providers = None
+
+    table = get_table()
+    if not table.rows:
+        util.exit_message("no size catalogs cached yet, run 'kloud catalog refresh <provider>'")
+
+    sl = table.find(float(cpu), float(ram), float(disk), max_price, providers, limit)
+
+    if not pretty:
+        return(sl)
+
+    render.emit(["Provider", "Region", "Size", "CPU", "RAM", "Disk", "Bandwidth", "Price"], sl, format,
+                {"Size": "l", "RAM": "r", "Disk": "r", "Bandwidth": "r", "Price": "r"},
+                float_format=".2")
+
+    return
+
+
+COMMANDS = \
+    {
+        "find": find_sizes,
+    }
+
+if __name__ == "__main__":
+    fire.Fire(COMMANDS)
@@ -2,21 +2,26 @@
 
 #  Copyright 2024 Denis Lussier All rights reserved. #
 
-import os, sys, configparser, sqlite3
+import os, sys, io, json, time, random, fnmatch, threading, hashlib, atexit, queue
+from concurrent.futures import ThreadPoolExecutor, Future, wait, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+# where the user ran the command; relative paths they give resolve against it
+USER_DIR = os.environ.get("KLOUD_CWD", os.getcwd())
 
 os.chdir(os.path.dirname(__file__))
 sys.path.append(os.path.join(os.path.dirname(__file__), "lib"))
 
 import fire
-import libcloud
-import util
-import cluster
-
-import termcolor
-from libcloud.compute.types import Provider
-from prettytable import PrettyTable
+import lazy
+import config
+import metadata
+import inventory
+import catalog
+import sizes
+import render
 
-CONFIG = f"{os.getenv('HOME')}/.pgedge-vm.conf"
+util = lazy.load("util")
 
 PROVIDERS = \
     [
@@ -27,52 +32,98 @@ PROVIDERS = \
         ["gcp", "gce",          "Google Cloud Platform"],
     ]
 
+# idle libcloud drivers keyed by (provider, region, credentials fingerprint);
+#   a driver keeps its last response on the instance, so a thread checks one
+#   out for its own use and a worker hands it back when its task is done,
+#   which keeps the keep-alive sessions warm from one pool to the next
+DRIVERS = {}
+DRIVERS_LOCK = threading.Lock()
+DRIVER_STATS = {"hits": 0, "misses": 0}
+DRIVERS_IDLE_MAX = 8
+_held = threading.local()
+
+AKM_ROOT_PASS = "AbcDDD1234!!!!!"
+
+# cluster definitions, cluster/<name>/<name>.json under the install dir
+CLUSTER_DIR = "cluster"
+
+# EC2 takes many instance ids per lifecycle call
+EC2_BATCH = 100
+EC2_ACTIONS = \
+    {
+        "start":   "StartInstances",
+        "stop":    "StopInstances",
+        "reboot":  "RebootInstances",
+        "destroy": "TerminateInstances",
+    }
+
+# whole-fleet listings: total worker threads & concurrent calls per provider
+LIST_WORKERS = 16
+PROVIDER_LIMITS = \
+    {
+        "aws": threading.BoundedSemaphore(8),
+        "eqn": threading.BoundedSemaphore(2),
+        "akm": threading.BoundedSemaphore(2),
+    }
+
+# 'vm list' table; declared widths let the header print before any region answers
+NODE_FIELDS = ["Provider", "Airport", "Name", "Status", "Country", "Region", "Zone", "Public IP", "Private IP", "ID", "Size"]
+NODE_ALIGN = {"Name": "l", "Size": "l", "Public IP": "l", "Private IP": "l", "Region": "l"}
+NODE_WIDTHS = {"Name": 28, "Status": 10, "Region": 14, "Zone": 15, "Public IP": 15, "Private IP": 15, "ID": 36, "Size": 16}
+
 
 def get_location(provider, location):
     conn, section, region, airport, project = get_connection(provider)
 
-    locations = conn.list_locations()
-    for ll in locations:
-        if ll.name.lower() == location.lower():
-            return ll
+    try:
+        return catalog.lookup(conn, "locations", location.lower())
+    except Exception as e:
+        util.exit_message(str(e), 1)
 
-    return None
 
 def get_key(conn, p_key):
-    keys = conn.list_key_pairs()
-    for k in keys:
-        if k.name == p_key:
-            return k.public_key
+    try:
+        k = catalog.lookup(conn, "keys", p_key)
+    except Exception as e:
+        util.exit_message(str(e), 1)
+
+    if k:
+        return k.public_key
 
     util.exit_message(f"Invalid key '{p_key}'")
 
 
 def get_size(conn, p_size):
-    sizes = conn.list_sizes()
-    for s in sizes:
-        if s.id == p_size:
-            return s
+    try:
+        s = catalog.lookup(conn, "sizes", p_size)
+    except Exception as e:
+        util.exit_message(str(e), 1)
+
+    if s:
+        return s
 
     util.exit_message(f"Invalid size '{p_size}'")
 
 
 def get_image(provider, conn, p_image):
     try:
-        if provider in ("ec2", "aws"):
-            images = conn.list_images(ex_image_ids={p_image})
-        else:
-            images = conn.list_images()
+        i = catalog.lookup(conn, "images", p_image)
     except Exception as e:
         util.exit_message(str(e), 1)
 
-    for i in images:
-        if i.id == p_image:
-            return i
+    if i:
+        return i
 
     util.exit_message(f"Invalid image '{p_image}'")
 
 
 def get_node_values(provider, region, name):
+    if inventory.is_fresh(provider, region):
+        nd = inventory.get_node(provider, region, name)
+        if not nd:
+            return None, None, None, None, None
+        return (nd["name"], nd["public_ip"], nd["state"], nd["zone"], nd["size"])
+
     conn, section, region, airport, project = get_connection(provider, region)
     nd = get_node(conn, name)
 
@@ -80,33 +131,58 @@ def get_node_values(provider, region, name):
         return None, None, None, None, None
 
     try:
-        name = str(nd.name)
-        public_ip = str(nd.public_ips[0])
-        status = str(nd.state)
-        size = None
-        if provider in ("eqn", "equinixmetal"):
-            country = str(nd.extra["facility"]["metro"]["country"]).lower()
-            zone = str(nd.extra["facility"]["code"])
-            size = str(nd.size.id)
-        else:
-            zone = ""
-            instance_type = ""
-
-            try:
-                zone = nd.extra["availability"]
-            except Exception:
-                pass
-
-            try:
-                size = nd.extra["instance_type"]
-            except Exception:
-                pass
+        return node_values(provider, nd)
     except Exception as e:
         util.exit_message(str(e), 1)
 
+
+def node_values(provider, nd):
+    """(name, public_ip, status, zone, size) of a libcloud node"""
+    name = str(nd.name)
+    public_ip = str(nd.public_ips[0])
+    status = str(nd.state)
+    size = None
+    if provider in ("eqn", "equinixmetal"):
+        country = str(nd.extra["facility"]["metro"]["country"]).lower()
+        zone = str(nd.extra["facility"]["code"])
+        size = str(nd.size.id)
+    else:
+        zone = ""
+        instance_type = ""
+
+        try:
+            zone = nd.extra["availability"]
+        except Exception:
+            pass
+
+        try:
+            size = nd.extra["instance_type"]
+        except Exception:
+            pass
+
     return (name, public_ip, status, zone, size)
 
 
+def get_group_values(provider, region, names):
+    """{name: node values} for many names in one (provider, region) listing"""
+    values = {}
+    if inventory.is_fresh(provider, region):
+        for name in names:
+            nd = inventory.get_node(provider, region, name)
+            if nd:
+                values[name] = (nd["name"], nd["public_ip"], nd["state"], nd["zone"], nd["size"])
+        return values
+
+    conn, sect, project, nodes = fetch_nodes(provider, region)
+    for n in nodes:
+        if n.state in ("terminated", "unknown"):
+            continue
+        if n.name in names and n.name not in values:
+            values[n.name] = node_values(provider, n)
+
+    return values
+
+
 def get_node(conn, name):
     nodes = conn.list_nodes()
     for n in nodes:
@@ -146,7 +222,10 @@ def node_action(action, provider, airport, name):
     util.exit_message(f"VM '{provider}:{region}:{name}' not found", 1)
 
 
-def is_node_unique(name, prvdr, conn, sect):
+def is_node_unique(name, prvdr, conn, sect, region=None):
+    if inventory.is_fresh(prvdr, region):
+        return inventory.get_node(prvdr, region, name) is None
+
     if prvdr in ("eqn", "equinixmetal"):
         project = sect["project"]
         nodes = conn.list_nodes(project)
@@ -173,9 +252,27 @@ def create_node(
 
     conn, sect, region, airport, project = get_connection(provider, region, project)
 
-    if not is_node_unique(name, provider, conn, sect):
+    if not is_node_unique(name, provider, conn, sect, region):
         util.exit_message(f"VM '{name}' already exists in '{provider}:{airport}'")
 
+    try:
+        size, image, ssh_key, project = node_defaults(provider, region, sect, size, image, ssh_key, project)
+    except ValueError as e:
+        util.exit_message(str(e), 1)
+
+    if provider in ("eqn", "equinixmetal"):
+        create_node_eqn(name, region, size, image, project)
+    elif provider in ("akm", "linode"):
+        create_node_akm(name, region, size, image, ssh_key)
+    elif provider in ("aws", "ec2"):
+        create_node_aws(name, region, size, image, ssh_key)
+
+    return
+
+
+def node_defaults(provider, region, sect, size=None, image=None, ssh_key=None, project=None):
+    """Fill in size, image, ssh_key & project from the provider's config section"""
+
     if provider in ("eqn", "equinixmetal"):
         if size is None:
             size = sect["size"]
@@ -184,8 +281,6 @@ def create_node(
         if project is None:
             project = sect["project"]
 
-        create_node_eqn(name, region, size, image, project)
-
     elif provider in ("akm", "linode"):
         if size is None:
             size = sect["size"]
@@ -194,10 +289,8 @@ def create_node(
         if ssh_key is None:
             ssh_key = sect["ssh_key"]
         if project:
-            util.exit_message("'project' is not a valid AKM parm", 1)
+            raise ValueError("'project' is not a valid AKM parm")
 
-        create_node_akm(name, region, size, image, ssh_key)
-                        
     elif provider in ("aws", "ec2"):
         if size is None:
             size = sect["size"]
@@ -206,15 +299,13 @@ def create_node(
             try:
                 image = sect[my_image]
             except Exception:
-                util.exit_message(f"Missing image-id for '{region}'")
+                raise ValueError(f"Missing image-id for '{region}'")
         if ssh_key is None:
             ssh_key = sect["ssh_key"]
         if project:
-            util.exit_message("'project' is not a valid AWS parm", 1)
+            raise ValueError("'project' is not a valid AWS parm")
 
-        create_node_aws(name, region, size, image, ssh_key)
-
-    return
+    return (size, image, ssh_key, project)
 
 
 def create_node_aws(name, region, size, image, ssh_key):
@@ -240,7 +331,7 @@ def create_node_akm(name, region, size, image, ssh_key):
 
     try:
         conn.create_node(
-            name=name, image=im, size=sz, root_pass="AbcDDD1234!!!!!", location=lctn, ex_authorized_keys=[key]
+            name=name, image=im, size=sz, root_pass=AKM_ROOT_PASS, location=lctn, ex_authorized_keys=[key]
         )
     except Exception as e:
         util.exit_message(str(e), 1)
@@ -264,6 +355,293 @@ def create_node_eqn(name, location, size, image, project):
     return
 
 
+def user_path(path):
+    """'path' as given on the command line, resolved against the user's dir"""
+    return os.path.join(USER_DIR, os.path.expanduser(str(path)))
+
+
+def create_specs(names=None, count=None, provider=None, airport=None, manifest=None):
+    """Expand a name pattern or a manifest into [provider, airport, name, size, image]
+
+    A manifest is a file (or a comma separated string) of
+    'provider:airport:name[:size[:image]]' entries.  A pattern uses '{n}'
+    for the node number, e.g. --names=pg-{n} --count=3.
+    """
+
+    specs = []
+    if manifest:
+        if isinstance(manifest, (list, tuple)):
+            entries = [str(m) for m in manifest]
+        elif os.path.isfile(user_path(manifest)):
+            with open(user_path(manifest)) as f:
+                entries = f.read().splitlines()
+        else:
+            entries = str(manifest).split(",")
+
+        for e in entries:
+            e = e.split("#")[0].strip()
+            if not e:
+                continue
+            el = e.split(":")
+            if len(el) < 3 or len(el) > 5:
+                util.exit_message(f"cannot parse '{e}' into provider:airport:name[:size[:image]]")
+            specs.append((el + [None, None])[:5])
+
+        return specs
+
+    if not (provider and airport and names):
+        util.exit_message("provider, airport & names (or a manifest) must be specified")
+
+    if isinstance(names, (list, tuple)):
+        nl = [str(n) for n in names]
+    else:
+        names = str(names)
+        if count is None:
+            count = 1
+        if count > 1 and "{n}" not in names:
+            names = names + "-{n}"
+        nl = [names.replace("{n}", str(n)) for n in range(1, int(count) + 1)]
+
+    for n in nl:
+        specs.append([provider, airport, n, None, None])
+
+    return specs
+
+
+class RateLimiter:
+    """Spaces out the calls made to one provider's API"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = max(0.0, self.next - now)
+            self.next = max(now, self.next) + self.interval
+
+        if delay:
+            time.sleep(delay)
+
+
+def plan_group(provider, region, specs, size, image, ssh_key, project):
+    """Uniqueness check & catalog resolution once for one (provider, region)
+
+    Returns the launches for the group (one per node, or one per distinct
+    size/image/key on EC2, which starts many instances in a single call)
+    and a status row for each node that can't be created.
+    """
+
+    conn, sect, project, nodes = fetch_nodes(provider, region, project)
+    taken = {n.name for n in nodes}
+
+    launches = {}
+    skipped = []
+    for p, a, name, sz, im in specs:
+        if name in taken:
+            skipped.append([provider, a, name, "exists", ""])
+            continue
+        taken.add(name)
+
+        sz, im, key, prj = node_defaults(provider, region, sect, sz or size, im or image, ssh_key, project)
+        parms = {"size": catalog.lookup(conn, "sizes", sz),
+                 "image": catalog.lookup(conn, "images", im)}
+        if parms["size"] is None:
+            skipped.append([provider, a, name, "failed", f"Invalid size '{sz}'"])
+            continue
+        if parms["image"] is None:
+            skipped.append([provider, a, name, "failed", f"Invalid image '{im}'"])
+            continue
+
+        if provider == "aws":
+            parms["ex_keyname"] = key
+        else:
+            parms["location"] = catalog.lookup(conn, "locations", region.lower())
+            if provider == "akm":
+                parms["root_pass"] = AKM_ROOT_PASS
+                parms["ex_authorized_keys"] = [catalog.lookup(conn, "keys", key).public_key]
+            else:
+                parms["ex_project_id"] = prj
+
+        if provider == "aws":
+            batch = (sz, im, key)
+        else:
+            batch = name
+        launches.setdefault(batch, (provider, region, a, [], parms))[3].append(name)
+
+    return list(launches.values()), skipped
+
+
+def launch(provider, region, airport, names, parms):
+    """Issue the create call(s) for one launch; one status row per node"""
+
+    rows = []
+    with PROVIDER_LIMITS[provider]:
+        CREATE_LIMITS[provider].wait()
+        try:
+            conn = get_connection(provider, region)[0]
+            if provider == "aws" and len(names) > 1:
+                nodes = conn.create_node(name=names[0], ex_mincount=len(names),
+                                         ex_maxcount=len(names), **parms)
+            else:
+                nodes = conn.create_node(name=names[0], **parms)
+        except (Exception, SystemExit) as e:
+            return [[provider, airport, n, "failed", str(e)] for n in names]
+
+        if not isinstance(nodes, list):
+            nodes = [nodes]
+        for name, nd in zip(names, nodes):
+            status = "created"
+            if nd.name != name:
+                CREATE_LIMITS[provider].wait()
+                try:
+                    conn.ex_create_tags(nd, {"Name": name})
+                except Exception as e:
+                    status = f"created (Name tag failed: {e})"
+            rows.append([provider, airport, name, status, nd.id])
+
+    return rows
+
+
+def create_many(names=None, count=None, provider=None, airport=None, manifest=None,
+                size=None, image=None, ssh_key=None, project=None, wait=False, pretty=True, format="table"):
+    """Create many VMs from a name pattern or a manifest"""
+
+    specs = create_specs(names, count, provider, airport, manifest)
+
+    groups = {}
+    for s in specs:
+        region = get_region(s[0], s[1])
+        if region is None:
+            util.exit_message(f"invalid provider:airport combo '{s[0]}:{s[1]}'")
+        if s[0] not in CREATE_LIMITS:
+            util.exit_message(f"Invalid provider '{s[0]}' (create-many)")
+        groups.setdefault((s[0], region), []).append(s)
+
+    render.message(f"  # creating {len(specs)} nodes in {len(groups)} regions", format=format)
+
+    sl = []
+    pool = WorkerPool(max_workers=LIST_WORKERS)
+    plans = {pool.submit(plan_group, p, r, gs, size, image, ssh_key, project): gs
+             for (p, r), gs in groups.items()}
+
+    launches = []
+    for f in plans:
+        try:
+            group_launches, skipped = f.result()
+            launches.extend(group_launches)
+            sl.extend(skipped)
+        except (Exception, SystemExit) as e:
+            sl.extend([s[0], s[1], s[2], "failed", str(e)] for s in plans[f])
+
+    for rows in pool.map(lambda l: launch(*l), launches):
+        sl.extend(rows)
+    pool.shutdown()
+
+    if wait:
+        created = [s for s in sl if s[3].startswith("created")]
+        ws, pending = wait_for(created, format=format)
+        states = {(w[0], w[1], w[2]): w[3] for w in ws}
+        for s in created:
+            s[3] = states[(s[0], s[1], s[2])]
+
+    if not pretty:
+        return(sl)
+
+    render.emit(["Provider", "Airport", "Name", "Status", "ID / Message"], sl, format,
+                {"Name": "l", "Status": "l", "ID / Message": "l"})
+
+    return
+
+
+def wait_for(specs, state="running", timeout=600, interval=2, max_interval=30, format="table"):
+    """Poll until every [provider, airport, name, ...] node reaches 'state'
+
+    Each polling round makes one list_nodes call per listing target (an
+    AWS region, or the whole EQN / AKM account), whatever the number of
+    nodes, and rounds are spaced by an exponential backoff with jitter.
+    Returns the status rows and the names still pending when the deadline
+    passed.
+    """
+
+    groups = {}
+    for s in specs:
+        region = get_region(s[0], s[1])
+        if region is None:
+            util.exit_message(f"invalid provider:airport combo '{s[0]}:{s[1]}'")
+        if s[0] not in NODE_LISTS:
+            util.exit_message(f"Invalid provider '{s[0]}' (wait)")
+        # EQN & AKM list the whole account in one call, AWS one region;
+        # a name is only unique within its region
+        target = inventory.target_region(s[0], region) or None
+        groups.setdefault((s[0], target), {})[(str(region).lower(), s[2])] = s[1]
+
+    start = time.monotonic()
+    deadline = start + timeout
+    states = {}
+    done = {}
+    delay = interval
+
+    pool = WorkerPool(max_workers=LIST_WORKERS)
+    while True:
+        polls = {pool.submit(fetch_nodes, p, r): (p, r)
+                 for (p, r), names in groups.items() if set(names) - set(done.get((p, r), {}))}
+        for f in polls:
+            key = polls[f]
+            try:
+                names = {n for r, n in groups[key]}
+                rows = NODE_LISTS[key[0]]([n for n in f.result()[3] if n.name in names], key[1])
+            except (Exception, SystemExit) as e:
+                render.message(f"  # {key[0]}:{key[1]} poll FAILED {e}", "warning", format)
+                continue
+            for row in rows:
+                node = (str(row[5]).lower(), row[2])
+                if node not in groups[key]:
+                    continue
+                if str(row[3]) in ("terminated", "unknown") and state != str(row[3]):
+                    continue
+                states[(key, node)] = str(row[3])
+                if str(row[3]) == state:
+                    done.setdefault(key, {}).setdefault(node, round(time.monotonic() - start, 1))
+
+        pending = [(k, n) for k, names in groups.items() for n in names if n not in done.get(k, {})]
+        now = time.monotonic()
+        if not pending or now >= deadline:
+            break
+
+        time.sleep(min(delay * random.uniform(0.5, 1.0), deadline - now))
+        delay = min(delay * 2, max_interval)
+
+    pool.shutdown()
+
+    sl = []
+    for (p, r), names in groups.items():
+        for n, airport in names.items():
+            elapsed = done.get((p, r), {}).get(n, "")
+            sl.append([p, airport, n[1], states.get(((p, r), n), "not found"), elapsed])
+
+    return(sl, [n for k, (r, n) in pending])
+
+
+def wait_nodes(nodes, state="running", timeout=600, pretty=True, format="table"):
+    """Wait for many VMs ('provider:airport:name' list) to reach a state"""
+
+    sl, pending = wait_for(create_specs(manifest=nodes), state, timeout, format=format)
+
+    if not pretty:
+        return(sl)
+
+    render.emit(["Provider", "Airport", "Name", "Status", "Seconds"], sl, format,
+                {"Name": "l", "Status": "l", "Seconds": "r"})
+
+    if pending:
+        util.exit_message(f"{len(pending)} node(s) not '{state}' after {timeout}s", 1)
+
+    return
+
+
 def start_node(provider, airport, vm_name):
     """Start a VM"""
     node_action("start", provider, airport, vm_name)
@@ -272,7 +650,7 @@ def start_node(provider, airport, vm_name):
 
 def stop_node(provider, airport, vm_name):
     """Stop a VM"""
-    node_action("stop", provider, airport, de_name)
+    node_action("stop", provider, airport, vm_name)
     return
 
 
@@ -288,7 +666,170 @@ def destroy_node(provider, airport, vm_name):
     return
 
 
-def list_keys(provider, airport=None, project=None):
+def has_tag(node, tag):
+    """True if a node carries 'key' or 'key=value' (EC2 dict or EQN/AKM list)"""
+    tags = node.extra.get("tags") or {}
+    key, sep, value = str(tag).partition("=")
+
+    if isinstance(tags, dict):
+        if key not in tags:
+            return False
+        return not sep or str(tags[key]) == value
+
+    return str(tag) in [str(t) for t in tags]
+
+
+def select_nodes(pattern=None, tag=None, provider=None, airport=None, timeout=60):
+    """Live nodes matching a name glob and/or tag, as (provider, region, conn, node, row)"""
+
+    if airport:
+        if not provider:
+            util.exit_message("provider must be specified with airport")
+        targets = [(provider, get_region(provider, airport))]
+    else:
+        targets = list_targets([provider] if provider else None)
+
+    pool = DaemonPool(LIST_WORKERS)
+    futures = {pool.submit(fetch_nodes, p, r): (p, r) for p, r in targets}
+    done, not_done = wait(futures, timeout=timeout)
+    pool.shutdown(cancel_futures=True)
+
+    selected = []
+    for f in futures:
+        p, r = futures[f]
+        if f in not_done:
+            util.exit_message(f"{p}:{r} TIMED OUT after {timeout}s listing nodes", 1)
+        try:
+            conn, sect, project, nodes = f.result()
+        except (Exception, SystemExit) as e:
+            util.exit_message(f"{p}:{r} FAILED listing nodes {e}", 1)
+
+        for n in nodes:
+            if str(n.state) in ("terminated", "unknown"):
+                continue
+            if pattern and not fnmatch.fnmatchcase(n.name, str(pattern)):
+                continue
+            if tag and not has_tag(n, tag):
+                continue
+            row = NODE_LISTS[p]([n], r)[0]
+            # EQN & AKM list the whole account; keep only the asked for region
+            if r and not inventory.target_region(p, r) and str(row[5]).lower() != str(r).lower():
+                continue
+            selected.append((p, r, conn, n, row))
+
+    return(selected)
+
+
+def ec2_batch_action(region, action, nodes):
+    """One EC2 API call per EC2_BATCH instance ids; returns {node.id: result}"""
+    try:
+        conn = get_connection("aws", region)[0]
+    except SystemExit as e:
+        return {n.id: f"failed: {e}" for n in nodes}
+
+    results = {}
+    for i in range(0, len(nodes), EC2_BATCH):
+        chunk = nodes[i:i + EC2_BATCH]
+        params = {"Action": EC2_ACTIONS[action]}
+        params.update(conn._pathlist("InstanceId", [n.id for n in chunk]))
+        CREATE_LIMITS["aws"].wait()
+        try:
+            conn.connection.request(conn.path, params=params)
+            results.update((n.id, "ok") for n in chunk)
+        except Exception as e:
+            results.update((n.id, f"failed: {e}") for n in chunk)
+
+    return(results)
+
+
+def single_action(provider, region, action, node):
+    with PROVIDER_LIMITS[provider]:
+        try:
+            conn = get_connection(provider, region)[0]
+            getattr(conn, f"{action}_node")(node)
+            return "ok"
+        except (Exception, SystemExit) as e:
+            return f"failed: {e}"
+
+
+def node_action_many(action, pattern=None, tag=None, provider=None, airport=None,
+                     yes=False, timeout=60, pretty=True, format="table"):
+    if not (pattern or tag):
+        util.exit_message("a name pattern and/or a tag must be specified")
+
+    selected = select_nodes(pattern, tag, provider, airport, timeout)
+    if not selected:
+        render.message("  # no nodes match", format=format)
+        return
+
+    groups = {}
+    for p, r, conn, n, row in selected:
+        groups.setdefault((p, r), []).append(n)
+
+    render.message(f"  # {action} {len(selected)} node(s):", format=format)
+    for (p, r), nodes in groups.items():
+        target = f"{p}:{r}" if r else p
+        render.message(f"  #   {target:<20} {len(nodes):>5}  {', '.join(n.name for n in nodes[:5])}"
+                       + (" ..." if len(nodes) > 5 else ""), format=format)
+
+    if not yes:
+        try:
+            answer = render.prompt(f"Proceed with {action} of {len(selected)} node(s)? (y/N) ", format)
+        except EOFError:
+            answer = ""
+        if answer.strip().lower() not in ("y", "yes"):
+            util.exit_message("cancelled (use --yes to skip this prompt)", 1)
+
+    results = {}
+    pool = WorkerPool(max_workers=LIST_WORKERS)
+    futures = {}
+    for (p, r), nodes in groups.items():
+        if p == "aws":
+            futures[pool.submit(ec2_batch_action, r, action, nodes)] = None
+        else:
+            for n in nodes:
+                futures[pool.submit(single_action, p, r, action, n)] = n
+    for f, n in futures.items():
+        if n is None:
+            results.update(f.result())
+        else:
+            results[n.id] = f.result()
+    pool.shutdown()
+
+    sl = []
+    for p, r, conn, n, row in selected:
+        sl.append([p, row[1], n.name, row[5], n.id, results.get(n.id, "")])
+
+    if not pretty:
+        return(sl)
+
+    render.emit(["Provider", "Airport", "Name", "Region", "ID", "Result"], sl, format,
+                {"Name": "l", "Region": "l", "Result": "l"})
+
+    return
+
+
+def start_many(pattern=None, tag=None, provider=None, airport=None, yes=False, pretty=True, format="table"):
+    """Start every VM matching a name glob and/or tag"""
+    return node_action_many("start", pattern, tag, provider, airport, yes, pretty=pretty, format=format)
+
+
+def stop_many(pattern=None, tag=None, provider=None, airport=None, yes=False, pretty=True, format="table"):
+    """Stop every VM matching a name glob and/or tag"""
+    return node_action_many("stop", pattern, tag, provider, airport, yes, pretty=pretty, format=format)
+
+
+def reboot_many(pattern=None, tag=None, provider=None, airport=None, yes=False, pretty=True, format="table"):
+    """Reboot every VM matching a name glob and/or tag"""
+    return node_action_many("reboot", pattern, tag, provider, airport, yes, pretty=pretty, format=format)
+
+
+def destroy_many(pattern=None, tag=None, provider=None, airport=None, yes=False, pretty=True, format="table"):
+    """Destroy every VM matching a name glob and/or tag"""
+    return node_action_many("destroy", pattern, tag, provider, airport, yes, pretty=pretty, format=format)
+
+
+def list_keys(provider, airport=None, project=None, pretty=True, format="table"):
     """List available SSH Keys"""
 
     if airport is None and provider == 'aws':
@@ -298,10 +839,16 @@ def list_keys(provider, airport=None, project=None):
     conn, sect, region, airport, project = get_connection(provider, region, project)
     keys = conn.list_key_pairs()
 
-    return(keys)
- 
+    if not pretty:
+        return(keys)
+
+    kl = [[provider, region or "", k.name, k.fingerprint] for k in keys]
+    render.emit(["Provider", "Region", "Name", "Fingerprint"], kl, format, {"Name": "l", "Fingerprint": "l"})
+
+    return
 
-def list_sizes(provider, airport=None, project=None, pretty=True):
+
+def list_sizes(provider, airport=None, project=None, pretty=True, format="table"):
     """List available VM"""
 
     region = get_region(provider, airport)
@@ -310,48 +857,54 @@ def list_sizes(provider, airport=None, project=None, pretty=True):
     if region is None:
         region = ""
 
-    sizes = conn.list_sizes()
-    sl = []
-    for s in sizes:
-        price = s.price
-        if price is None:
-            price = 0
-        ram = s.ram
-        if ram is None:
-            ram = 0
-        bandwidth = s.bandwidth
-        if bandwidth is None or str(bandwidth) == "0":
-            bandwidth = ""
-        cpu = ""
-        if provider in ("aws", "ec2"):
-            cpu = s.extra["vcpu"]
-        elif provider in ("eqn", "equinixmetal"):
-            cpu = s.extra["cpus"]
-        elif provider == "akm":
-            cpu = s.extra["vcpus"]
-        if cpu is None:
-            cpu = ""
-        sl.append([provider, region, s.id, cpu, round(ram/1024), s.disk, bandwidth, price])
+    try:
+        sl = [sizes.normalize(provider, region, s) for s in catalog.get(conn, "sizes").values()]
+    except Exception as e:
+        util.exit_message(str(e), 1)
 
     if not pretty:
         return(sl)
 
-    p = PrettyTable()
-    p.field_names = ["Provider", "Region", "Size", "CPU", "RAM", "Disk", "Bandwidth", "Price"]
-    p.add_rows(sl)
-    p.float_format = ".2"
-    p.align["Size"] = "l"
-    p.align["RAM"] = "r"
-    p.align["Disk"] = "r"
-    p.align["Bandwidth"] = "r"
-    p.align["Price"] = "r"
-    print(p)
+    render.emit(["Provider", "Region", "Size", "CPU", "RAM", "Disk", "Bandwidth", "Price"], sl, format,
+                {"Size": "l", "RAM": "r", "Disk": "r", "Bandwidth": "r", "Price": "r"},
+                float_format=".2")
 
     return
 
 
-def list_nodes(provider, airport=None, project=None, pretty=True):
-    """List virtual machines"""
+def list_nodes(provider=None, airport=None, project=None, pretty=True, all=False, timeout=60,
+               format="table", watch=False, interval=5, max_interval=60):
+    """List virtual machines (--all for every configured provider & region, --watch to follow)"""
+
+    if not all and provider is None:
+        util.exit_message("provider must be specified (or use --all)")
+
+    if watch:
+        return watch_nodes(provider, airport, project, all, timeout, interval, max_interval)
+
+    failed = []
+    if all:
+        if not pretty:
+            nl, failed, listed = list_all_nodes(timeout)
+            return(nl)
+        nl = iter_all_nodes(timeout, None, failed, [])
+    else:
+        nl = provider_nodes(provider, airport, project)
+
+        if not pretty:
+            return(nl)
+
+    render.emit(NODE_FIELDS, nl, format, NODE_ALIGN, NODE_WIDTHS)
+
+    for provider, region, reason in failed:
+        target = f"{provider}:{region}" if region else provider
+        render.message(f"  # {target} {reason}", "warning", format)
+
+    return
+
+
+def provider_nodes(provider, airport=None, project=None):
+    """Node rows of one provider (& region)"""
 
     region = get_region(provider, airport)
     conn, sect, region, airport, project = get_connection(provider, region, project)
@@ -368,28 +921,369 @@ def list_nodes(provider, airport=None, project=None, pretty=True):
     else:
         util.exit_message(f"Invalid provider '{provider}' (list_nodes)")
 
-    if not pretty:
-        return(nl)
-    
-    p = PrettyTable()
-    p.field_names = ["Provider", "Airport", "Name", "Status", "Country", "Region", "Zone", "Public IP", "Private IP", "ID", "Size"]
-    p.align["Name"] = "l"
-    p.align["Size"] = "l"
-    p.align["Public IP"] = "l"
-    p.align["Private IP"] = "l"
-    p.align["Region"] = "l"
-    p.add_rows(nl)
-    print(p)
+    return(nl)
+
+
+class NodeWatch:
+    """'vm list' table that repaints only the rows that changed between polls
+
+    Rows are keyed by (provider, id).  On a terminal the changed rows are
+    rewritten in place with ANSI cursor moves and highlighted until the
+    next poll, new nodes are appended and vanished ones are marked 'gone';
+    otherwise every transition is printed as a line of its own.
+    """
+
+    # row fields whose change is a transition worth showing
+    WATCHED = [3, 7, 8]
+
+    def __init__(self, out=None, tty=None):
+        self.out = out or sys.stdout
+        self.tty = self.out.isatty() if tty is None else tty
+        self.table = None
+        self.keys = []
+        self.rows = {}
+        self.hot = set()
+        self.status = ""
+
+    def key(self, row):
+        return (str(row[0]), str(row[9]))
+
+    def color(self, state):
+        state = str(state).lower()
+        if state == "running":
+            return "green"
+        if state in ("gone", "terminated", "stopped", "error"):
+            return "red"
+        return "yellow"
+
+    def line(self, key, hot=False):
+        import termcolor
+
+        cells = [render.cell(v) for v in self.rows[key]]
+        text = self.table.line(cells).rstrip("\n")
+        if hot:
+            text = termcolor.colored(text, self.color(self.rows[key][3]), attrs=["bold"])
+
+        return text
+
+    def paint(self, keys, hot):
+        """Rewrite rows in place (the cursor rests on the status line)"""
+        buf = []
+        for key in keys:
+            up = len(self.keys) - self.keys.index(key) + 1
+            buf.append(f"\x1b[{up}A\r\x1b[2K{self.line(key, key in hot)}\x1b[{up}B\r")
+        self.out.write("".join(buf))
+
+    def start(self, nl):
+        for row in nl:
+            self.keys.append(self.key(row))
+            self.rows[self.key(row)] = list(row)
+
+        if not self.tty:
+            render.emit(NODE_FIELDS, nl, "table", NODE_ALIGN, NODE_WIDTHS)
+            return
+
+        self.table = render.StreamTable(NODE_FIELDS, NODE_ALIGN, NODE_WIDTHS, out=io.StringIO())
+        for row in nl:
+            self.table.add_row(row)
+        self.out.write(self.table.out.getvalue() + self.table.rule())
+        self.out.flush()
+
+    def target(self, row):
+        return (str(row[0]), inventory.target_region(str(row[0]), row[5]))
+
+    def update(self, nl, listed=None):
+        """Diff a new poll against the table; returns the number of changes
+
+        Only nodes of the (provider, region) targets in 'listed' (every
+        target if None) can be marked gone; a target that failed or timed
+        out says nothing about its nodes.
+        """
+        if listed is not None:
+            listed = {(str(p), inventory.target_region(str(p), r)) for p, r in listed}
+
+        seen = {}
+        for row in nl:
+            seen[self.key(row)] = list(row)
+
+        changes = []
+        for key, row in seen.items():
+            old = self.rows.get(key)
+            if old is None:
+                changes.append((key, None, row))
+            elif any(old[i] != row[i] for i in self.WATCHED):
+                changes.append((key, old, row))
+        for key in self.keys:
+            if key in seen or self.rows[key][3] == "gone":
+                continue
+            if listed is None or self.target(self.rows[key]) in listed:
+                row = list(self.rows[key])
+                row[3] = "gone"
+                changes.append((key, self.rows[key], row))
+
+        if self.tty:
+            self.repaint(changes)
+        else:
+            self.report(changes)
+
+        return len(changes)
+
+    def repaint(self, changes):
+        added = [key for key, old, row in changes if old is None]
+        changed = {key for key, old, row in changes if old is not None}
+        for key, old, row in changes:
+            self.rows[key] = row
+
+        # last poll's highlights go back to plain, this poll's get theirs
+        self.paint([k for k in self.keys if k in self.hot or k in changed], changed)
+
+        if added:
+            # the new rows take over the footer & status lines, then both move down
+            buf = ["\x1b[1A\r\x1b[2K"]
+            for key in added:
+                buf.append(self.line(key, True) + "\n")
+            buf.append(self.table.rule() + "\x1b[2K")
+            self.out.write("".join(buf))
+            self.keys.extend(added)
+
+        self.hot = changed | set(added)
+        self.out.flush()
+
+    def report(self, changes):
+        now = time.strftime("%H:%M:%S")
+        for key, old, row in changes:
+            name = f"{row[0]}:{row[2]} ({row[9]})"
+            if old is None:
+                text = f"{now} {name} new {row[3]} {row[7]}".rstrip()
+            else:
+                moves = [f"{NODE_FIELDS[i].lower()} {old[i] or '-'} -> {row[i] or '-'}"
+                         for i in self.WATCHED if old[i] != row[i]]
+                text = f"{now} {name} " + ", ".join(moves)
+            print(text, file=self.out)
+            if old is None:
+                self.keys.append(key)
+            self.rows[key] = row
+        self.out.flush()
+
+    def show_status(self, text):
+        if self.tty:
+            self.out.write(f"\r\x1b[2K{text}")
+            self.out.flush()
+
+
+def watch_nodes(provider=None, airport=None, project=None, all=False, timeout=60,
+                interval=5, max_interval=60):
+    """Poll a node list until Ctrl-C, showing only what changed
+
+    Drivers stay pooled (warm) between polls.  The poll interval starts at
+    'interval' seconds, grows by half after every quiet poll up to
+    'max_interval', and drops back as soon as anything changes.
+    """
+
+    def poll():
+        if all:
+            nl, failed, listed = list_all_nodes(timeout)
+            return nl, listed
+        return provider_nodes(provider, airport, project), None
+
+    view = NodeWatch()
+    view.start(poll()[0])
+    wait_s = float(interval)
+
+    try:
+        while True:
+            view.show_status(f"  # {len(view.keys)} nodes, next poll in {wait_s:.0f}s (Ctrl-C to stop)")
+            time.sleep(wait_s)
+            view.show_status("  # polling ...")
+            if view.update(*poll()):
+                wait_s = float(interval)
+            else:
+                wait_s = min(wait_s * 1.5, float(max_interval))
+    except KeyboardInterrupt:
+        view.show_status("")
 
     return
 
 
+class WorkerPool(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose tasks hand their libcloud drivers back when done"""
+
+    def __init__(self, max_workers=None):
+        lazy.ready()
+        super().__init__(max_workers=max_workers)
+
+    def submit(self, fn, *args, **kwargs):
+        def task():
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                release_drivers()
+
+        return super().submit(task)
+
+
+class DaemonPool:
+    """Runs calls on daemon threads, which are not joined when python exits
+
+    For listings bounded by --timeout: ThreadPoolExecutor workers are joined
+    at exit, so one hung region would hold the process open long after the
+    table printed.  Only the methods the listings use are provided.
+    """
+
+    def __init__(self, max_workers):
+        lazy.ready()
+        self.max_workers = max_workers
+        self.tasks = queue.SimpleQueue()
+        self.threads = []
+
+    def submit(self, fn, *args):
+        f = Future()
+        self.tasks.put((f, fn, args))
+        if len(self.threads) < self.max_workers:
+            t = threading.Thread(target=self.work, daemon=True)
+            t.start()
+            self.threads.append(t)
+
+        return f
+
+    def work(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            f, fn, args = task
+            if not f.set_running_or_notify_cancel():
+                continue
+            try:
+                f.set_result(fn(*args))
+            except BaseException as e:
+                f.set_exception(e)
+            finally:
+                release_drivers()
+
+    def shutdown(self, cancel_futures=False):
+        """Let idle workers exit; never waits for a call still running"""
+        if cancel_futures:
+            while True:
+                try:
+                    task = self.tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if task is not None:
+                    task[0].cancel()
+        for t in self.threads:
+            self.tasks.put(None)
+
+
+def list_targets(providers=None):
+    """(provider, region) pairs to list for a whole-fleet view
+
+    AWS is listed region by region over its active regions; the EQN & AKM
+    APIs return every node on the account in one call, so they are listed once.
+    """
+
+    sections = config.get_sections()
+    targets = []
+    for provider in NODE_LISTS:
+        if provider not in sections:
+            continue
+        if providers and provider not in providers:
+            continue
+        if provider == "aws":
+            for airport, region in metadata.get_index().active_regions(provider):
+                if (provider, region) not in targets:
+                    targets.append((provider, region))
+        else:
+            targets.append((provider, None))
+
+    return(targets)
+
+
+def fetch_nodes(provider, region, project=None):
+    """One list_nodes call for (provider, region), within the provider's limit"""
+    with PROVIDER_LIMITS[provider]:
+        conn, sect, region, airport, project = get_connection(provider, region, project)
+        if provider == "eqn":
+            nodes = conn.list_nodes(project)
+        else:
+            nodes = conn.list_nodes()
+
+    return(conn, sect, project, nodes)
+
+
+def list_target_nodes(provider, region):
+    conn, sect, project, nodes = fetch_nodes(provider, region)
+
+    return(NODE_LISTS[provider](nodes, region))
+
+
+def iter_all_nodes(timeout=60, providers=None, failed=None, listed=None):
+    """Row batches from every configured provider & active region, as each answers
+
+    Targets that fail or do not answer within 'timeout' seconds are appended
+    to 'failed' as (provider, region, reason), the others to 'listed'.
+    """
+
+    if failed is None:
+        failed = []
+    if listed is None:
+        listed = []
+
+    targets = list_targets(providers)
+    pool = DaemonPool(LIST_WORKERS)
+    futures = {pool.submit(list_target_nodes, p, r): (p, r) for p, r in targets}
+    seen = set()
+
+    try:
+        for f in as_completed(futures, timeout=timeout):
+            seen.add(f)
+            provider, region = futures[f]
+            try:
+                rows = f.result()
+            except (Exception, SystemExit) as e:
+                failed.append((provider, region, f"FAILED {e}"))
+                continue
+            listed.append((provider, region))
+            rows.sort(key=lambda n: (str(n[0]), str(n[1]), str(n[2])))
+            yield rows
+    except FuturesTimeout:
+        for f in futures:
+            if f not in seen:
+                provider, region = futures[f]
+                failed.append((provider, region, f"TIMED OUT after {timeout}s"))
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def list_all_nodes(timeout=60, providers=None):
+    """List nodes in every configured provider & active region concurrently
+
+    Returns the merged rows plus a list of (provider, region, reason) for the
+    targets that failed or did not answer within 'timeout' seconds, and the
+    list of targets that were listed completely.
+    """
+
+    nl = []
+    failed = []
+    listed = []
+    for rows in iter_all_nodes(timeout, providers, failed, listed):
+        nl.extend(rows)
+
+    nl.sort(key=lambda n: (str(n[0]), str(n[1]), str(n[2])))
+
+    return(nl, failed, listed)
+
+
 def akm_node_list(conn, region):
     try:
         nodes = conn.list_nodes()
     except Exception as e:
         util.exit_message(str(e), 1)
 
+    return(akm_node_rows(nodes, region))
+
+
+def akm_node_rows(nodes, region):
     nl = []
     for n in nodes:
         name = n.name
@@ -423,6 +1317,10 @@ def aws_node_list(conn, region):
     except Exception as e:
         util.exit_message(str(e), 1)
 
+    return(aws_node_rows(nodes, region))
+
+
+def aws_node_rows(nodes, region):
     nl = []
     for n in nodes:
         name = n.name
@@ -452,6 +1350,10 @@ def azr_node_list(conn, region):
     except Exception as e:
         util.exit_message(str(e), 1)
 
+    return(azr_node_rows(nodes, region))
+
+
+def azr_node_rows(nodes, region):
     nl = []
     for n in nodes:
         name = n.name
@@ -478,6 +1380,10 @@ def azr_node_list(conn, region):
 def eqn_node_list(conn, region, project):
     nodes = conn.list_nodes(project)
 
+    return(eqn_node_rows(nodes, region))
+
+
+def eqn_node_rows(nodes, region):
     nl = []
     for n in nodes:
         name = n.name
@@ -495,70 +1401,97 @@ def eqn_node_list(conn, region, project):
     return(nl)
 
 
-def load_config(section):
-    # make section an alias
-    if section == "equinixmetal":
-        section = "eqn"
-    elif section == "ec2":
-        section = "aws"
-
-    if not os.path.exists(CONFIG):
-        util.exit_message(f"config file {CONFIG} missing")
-    try:
-        config = configparser.ConfigParser()
-        rc = config.read(CONFIG)
-        sect = config[section]
-        return(sect)
-    except Exception:
-        util.exit_message(f"missing section '{section}' in config file '{CONFIG}'")
-
-    return None
-
-
 def get_connection(provider=None, region=None, project=None):
-    sect = load_config(provider)
-
-    # convert provider to libcloud from an alias
-    if provider == "aws":
-        provider = "ec2"
-    elif provider == "eqn":
-        provider = "equinixmetal"
-    elif provider == "akm":
-        provider = "linode"
+    sect = config.load_config(provider)
+    provider = config.libcloud_name(provider)
 
     try:
-        Driver = libcloud.compute.providers.get_driver(provider)
         if provider in ("equinixmetal"):
-            p1 = sect["api_token"]
-            conn = Driver(p1)
+            creds = (sect["api_token"],)
+            conn = get_pooled_driver(provider, None, creds)
             if not project:
                 project = sect["project"]
         elif provider in ("ec2"):
-            p1 = sect["access_key_id"]
-            p2 = sect["secret_access_key"]
+            creds = (sect["access_key_id"], sect["secret_access_key"])
             if not region:
                 region = sect["region"]
-            conn = Driver(p1, p2, region=region )
+            conn = get_pooled_driver(provider, region, creds)
         elif provider in ("linode"):
-            p1 = sect["access_token"]
-            conn = Driver(p1)
+            creds = (sect["access_token"],)
+            conn = get_pooled_driver(provider, None, creds)
         else:
             util.exit_message(f"Invalid provider '{provider}'")
     except Exception as e:
         util.exit_message(str(e), 1)
 
-    airport = get_airport(provider, region)
+    airport = get_airport(config.alias(provider), region)
 
     return (conn, sect, region, airport, project)
 
 
+def get_pooled_driver(provider, region, creds):
+    """Return a libcloud driver for (provider, region, creds) that only this thread uses
+
+    The thread keeps the driver until release_drivers(); it is an idle pooled
+    one when there is one, else a new one.
+    """
+    fingerprint = hashlib.sha256("\0".join(creds).encode()).hexdigest()[:16]
+    key = (provider, region, fingerprint)
+
+    held = getattr(_held, "drivers", None)
+    if held is None:
+        held = _held.drivers = {}
+    conn = held.get(key)
+    if conn is not None:
+        return conn
+
+    with DRIVERS_LOCK:
+        idle = DRIVERS.get(key)
+        if idle:
+            conn = idle.pop()
+            DRIVER_STATS["hits"] += 1
+        else:
+            DRIVER_STATS["misses"] += 1
+
+    if conn is None:
+        # only the selected provider's driver module gets imported
+        from libcloud.compute.providers import get_driver
+        Driver = get_driver(provider)
+        if region:
+            conn = Driver(*creds, region=region)
+        else:
+            conn = Driver(*creds)
+
+    held[key] = conn
+
+    return conn
+
+
+def release_drivers():
+    """Hand the calling thread's drivers back to the pool (up to DRIVERS_IDLE_MAX per key)"""
+    held = getattr(_held, "drivers", None)
+    if not held:
+        return
+
+    with DRIVERS_LOCK:
+        for key, conn in held.items():
+            idle = DRIVERS.setdefault(key, [])
+            if len(idle) < DRIVERS_IDLE_MAX:
+                idle.append(conn)
+    held.clear()
+
+    return
+
+
+def driver_stats():
+    """Hit/miss counters & number of idle drivers in the pool"""
+    with DRIVERS_LOCK:
+        return {**DRIVER_STATS, "drivers": sum(len(idle) for idle in DRIVERS.values())}
+
+
 def is_region(region):
     try:
-        cursor = cL.cursor()
-        cursor.execute(f"SELECT count(*) FROM airport_regions WHERE region = '{region}'")
-        data = cursor.fetchone()
-        if data[0] > 0:
-            return(True)
+        return metadata.get_index().is_region(region)
     except Exception as e:
         util.exit_message(f"is_region({region}) ERROR:\n {str(e)}", 1)
 
@@ -567,11 +1500,7 @@ def is_region(region):
 
 def is_parent(parent):
     try:
-        cursor = cL.cursor()
-        cursor.execute(f"SELECT count(*) FROM airport_regions WHERE parent = '{parent}'")
-        data = cursor.fetchone()
-        if data[0] > 0:
-            return(True)
+        return metadata.get_index().is_parent(parent)
     except Exception as e:
         util.exit_message(f"is_parent({parent}) ERROR:\n {str(e)}", 1)
 
@@ -580,11 +1509,7 @@ def is_parent(parent):
 
 def is_airport(airport):
     try:
-        cursor = cL.cursor()
-        cursor.execute(f"SELECT count(*) FROM airports WHERE airport = '{airport}'")
-        data = cursor.fetchone()
-        if data[0] > 0:
-            return(True)
+        return metadata.get_index().is_airport(airport)
     except Exception as e:
         util.exit_message(f"vm.is_airport({airport}) ERROR:\n {str(e)}", 1)
 
@@ -594,11 +1519,9 @@ def is_airport(airport):
 def get_region(provider, airport):
     if airport:
         try:
-            cursor = cL.cursor()
-            cursor.execute(f"SELECT region FROM airport_regions WHERE provider = '{provider}' AND airport = '{airport}'")
-            data = cursor.fetchone()
-            if data:
-                return(str(data[0]))
+            region = metadata.get_index().get_region(provider, airport)
+            if region:
+                return(region)
         except Exception as e:
             util.exit_message(f"vm.get_region({provider}:{airport}) ERROR:\n {str(e)}")
     else:
@@ -610,11 +1533,7 @@ def get_region(provider, airport):
 
 def get_airport(provider, region):
     try:
-        cursor = cL.cursor()
-        cursor.execute(f"SELECT airport FROM airport_regions WHERE provider = '{provider}' AND region = '{region}'")
-        data = cursor.fetchone()
-        if data:
-            return(str(data[0]))
+        return metadata.get_index().get_airport(provider, region)
     except Exception as e:
         util.exit_message(f"vm.get_airport({provider}:{region}) ERROR:\n {str(e)}", 1)
 
@@ -623,62 +1542,147 @@ def get_airport(provider, region):
 
 def cluster_define(cluster_name, nodes):
     """Create a json config file for a vm cluster"""
-    nl = str(nodes).split(",")
+    if isinstance(nodes, (list, tuple)):
+        nl = [str(n) for n in nodes]
+    else:
+        nl = str(nodes).split(",")
     if len(nl) < 1:
         util.exit_message("Must be a comma seperated list of 'provider:airport:node_name' triplets")
 
-    os_user = "root"
-    ssh_key = "~/keys/eqn-test-key"
-
-    cluster.json_create(cluster_name, "remote", os_user=os_user, ssh_key=ssh_key)
-
     util.message(f"cluster_create node list = {nl}", "debug")
+
+    triplets = []
+    groups = {}
     for n in nl:
         ns = n.strip()
         nsl = ns.split(":")
         if len(nsl) != 3:
             util.exit_message(f"cannot parse '{ns}' into provider:airport:node_name")
-        provider = nsl[0]
-        airport = nsl[1]
+        provider, airport, node_name = nsl
         region = get_region(provider, airport)
         if region is None:
             util.exit_message(f"invalid provider:airport combo '{provider}:{airport}'")
-        node_name = nsl[2]
-        name, public_ip, status, zone, size = get_node_values(provider, region, node_name)
-
-        if name is None:
+        # EQN & AKM list the whole account in one call, AWS one region
+        target = inventory.target_region(provider, region) or None
+        triplets.append((provider, airport, target, node_name))
+        groups.setdefault((provider, target), set()).add(node_name)
+
+    # one listing per target, all targets at once
+    pool = WorkerPool(max_workers=LIST_WORKERS)
+    futures = {k: pool.submit(get_group_values, k[0], k[1], names) for k, names in groups.items()}
+    values = {}
+    for (provider, target), f in futures.items():
+        try:
+            values[(provider, target)] = f.result()
+        except (Exception, SystemExit) as e:
+            util.exit_message(f"cannot list nodes in {provider}:{target or 'all'}: {e}", 1)
+    pool.shutdown()
+
+    nodes = []
+    for provider, airport, target, node_name in triplets:
+        nv = values[(provider, target)].get(node_name)
+        if nv is None:
             util.exit_message(f"node {node_name} not found for {provider}:{airport}")
 
-        sect = load_config(provider)
+        sect = config.load_config(provider)
         ssh_key = sect["ssh_key"]
         try:
             os_user = sect["os_user"]
         except Exception:
             os_user = "root"
 
-        util.message(f"cluster_create node_values = {name}, {public_ip}, {status}", "debug")
+        util.message(f"cluster_create node_values = {nv[0]}, {nv[1]}, {nv[2]}", "debug")
+        nodes.append((provider, airport, node_name, nv[1], os_user, ssh_key))
 
-        cluster.json_add_node(cluster_name, "remote", node_name, True, 
-            public_ip, 5432, "/opt/pgedge", os_user=os_user, ssh_key=ssh_key, 
-            provider=provider, airport=airport)
+    write_cluster_json(cluster_name, nodes)
 
-    return 
+    return
 
 
-# MAINLINE ################################################################
-cL = sqlite3.connect(util.MY_LITE, check_same_thread=False)
+def write_cluster_json(cluster_name, nodes):
+    """Write cluster/<name>/<name>.json for resolved nodes in one atomic replace
 
-if __name__ == "__main__":
-    fire.Fire(
+    The whole document is built first, written to a temp file next to the
+    real one and renamed over it: readers see the old file or the new one,
+    never a partial one.
+    """
+
+    doc = \
         {
-            "list-sizes":     list_sizes,
-            "list-keys":      list_keys,
-            "list":           list_nodes,
-            "create":         create_node,
-            "start":          start_node,
-            "stop":           stop_node,
-            "reboot":         reboot_node,
-            "destroy":        destroy_node,
-            "cluster-define": cluster_define,
+            "name": cluster_name,
+            "style": "remote",
+            "create_date": time.strftime("%Y-%m-%d"),
+            "remote": {"os_user": "root", "ssh_key": "~/keys/eqn-test-key"},
+            "node_groups": {"remote": []},
         }
-    )
+    for provider, airport, node_name, public_ip, os_user, ssh_key in nodes:
+        doc["node_groups"]["remote"].append(
+            {
+                "name": node_name,
+                "is_active": True,
+                "ip_address": public_ip,
+                "port": 5432,
+                "path": "/opt/pgedge",
+                "os_user": os_user,
+                "ssh_key": ssh_key,
+                "provider": provider,
+                "airport": airport,
+            })
+
+    cluster_dir = os.path.join(CLUSTER_DIR, cluster_name)
+    os.makedirs(cluster_dir, exist_ok=True)
+    cluster_file = os.path.join(cluster_dir, f"{cluster_name}.json")
+
+    tmp = f"{cluster_file}.tmp"
+    try:
+        with open(tmp, "w") as f:
+            f.write(json.dumps(doc, indent=2))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, cluster_file)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+    return
+
+
+# MAINLINE ################################################################
+NODE_LISTS = \
+    {
+        "aws": aws_node_rows,
+        "eqn": eqn_node_rows,
+        "akm": akm_node_rows,
+    }
+
+# minimum seconds between create calls to one provider
+CREATE_LIMITS = \
+    {
+        "aws": RateLimiter(0.2),
+        "eqn": RateLimiter(1.0),
+        "akm": RateLimiter(0.5),
+    }
+
+atexit.register(lambda: util.message(f"driver pool {driver_stats()}", "debug"))
+
+COMMANDS = \
+    {
+        "list-sizes":     list_sizes,
+        "list-keys":      list_keys,
+        "list":           list_nodes,
+        "create":         create_node,
+        "create-many":    create_many,
+        "wait":           wait_nodes,
+        "start":          start_node,
+        "stop":           stop_node,
+        "reboot":         reboot_node,
+        "destroy":        destroy_node,
+        "start-many":     start_many,
+        "stop-many":      stop_many,
+        "reboot-many":    reboot_many,
+        "destroy-many":   destroy_many,
+        "cluster-define": cluster_define,
+    }
+
+if __name__ == "__main__":
+    fire.Fire(COMMANDS)
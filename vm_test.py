@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+#  Copyright 2024 Denis Lussier All rights reserved. #
+
+import types
+import unittest
+from unittest import mock
+
+import vm
+
+
+def akm_node(name, location):
+    return types.SimpleNamespace(name=name, id=f"{name}-{location}", state="running", size="g6",
+                                 public_ips=["192.0.2.1"], private_ip=[], extra={"location": location})
+
+
+class SelectNodesTest(unittest.TestCase):
+
+    def test_account_wide_listing_is_scoped_to_the_airport(self):
+        nodes = [akm_node("pg-1", "us-iad"), akm_node("pg-1", "us-ord"), akm_node("pg-2", "us-iad")]
+
+        with mock.patch.object(vm, "get_region", return_value="us-iad"), \
+                mock.patch.object(vm, "get_airport", side_effect=lambda p, r: r), \
+                mock.patch.object(vm, "fetch_nodes", return_value=(None, {}, None, nodes)):
+            selected = vm.select_nodes(pattern="pg-*", provider="akm", airport="iad")
+
+        self.assertEqual(sorted(n.id for p, r, conn, n, row in selected), ["pg-1-us-iad", "pg-2-us-iad"])
+
+
+class WaitForTest(unittest.TestCase):
+
+    def test_same_name_in_two_airports_is_tracked_separately(self):
+        nodes = [akm_node("db1", "us-iad"), akm_node("db1", "us-ord")]
+        nodes[1].state = "pending"
+
+        with mock.patch.object(vm, "get_region", side_effect=lambda p, a: {"iad": "us-iad", "ord": "us-ord"}[a]), \
+                mock.patch.object(vm, "get_airport", side_effect=lambda p, r: r), \
+                mock.patch.object(vm, "fetch_nodes", return_value=(None, {}, None, nodes)):
+            sl, pending = vm.wait_for([["akm", "iad", "db1"], ["akm", "ord", "db1"]], timeout=0)
+
+        self.assertEqual([s[:4] for s in sl], [["akm", "iad", "db1", "running"], ["akm", "ord", "db1", "pending"]])
+        self.assertEqual(pending, ["db1"])
+
+
+if __name__ == "__main__":
+    unittest.main()